@@ -0,0 +1,252 @@
+# app/batch_import.py
+"""
+Batch PDF import: many PDFs (or ZIP archives of PDFs) are fanned out over the
+extraction pool and one NDJSON line is streamed per file as soon as it is done.
+"""
+import asyncio
+import json
+import os
+import zipfile
+from tempfile import SpooledTemporaryFile
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from .extraction_pool import ExtractionTimeout, EXTRACT_WORKERS
+from .extraction_cache import cached_extract
+from .storage import MAX_UPLOAD_MB
+
+# documents read into memory / queued on the pool at any one time
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", str(2 * EXTRACT_WORKERS)))
+MAX_PDF_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+# parts larger than this are spooled to disk while the request is being read
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+class BatchItemError(Exception):
+    pass
+
+
+def multipart_boundary(content_type: str):
+    """The boundary of a multipart/form-data Content-Type, or None."""
+    mime, params = parse_options_header(content_type or "")
+    if mime != b"multipart/form-data":
+        return None
+    return params.get(b"boundary")
+
+
+async def receive_uploads(stream, boundary: bytes, body_read: asyncio.Event):
+    """
+    Async generator of UploadFiles, one per file part of a multipart/form-data
+    body (`stream` is request.stream()), yielded as soon as the part has been
+    read off the wire.
+
+    Unlike request.form() this neither waits for the whole body nor caps the
+    number of files (Starlette rejects more than 1000), so extraction of the
+    first PDFs overlaps the upload of the rest. Non-file fields are ignored.
+    `body_read` is set once the request body has been consumed (or abandoned).
+    """
+    events = []
+    headers = {}
+    header = {"field": b"", "value": b""}
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        headers[header["field"].lower()] = header["value"]
+        header["field"] = header["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        events.append(("begin", None if filename is None else filename.decode("utf-8", "replace")))
+        headers.clear()
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", None)),
+    })
+
+    uploads = []
+    current = None
+    try:
+        async for chunk in stream:
+            parser.write(chunk)
+            for kind, value in events:
+                if kind == "begin":
+                    if value is not None:
+                        current = UploadFile(SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES), filename=value)
+                        uploads.append(current)
+                elif current is None:
+                    continue
+                elif kind == "data":
+                    await current.write(value)
+                else:
+                    await current.seek(0)
+                    yield current
+                    current = None
+            events.clear()
+        parser.finalize()
+    except ClientDisconnect:
+        return
+    finally:
+        body_read.set()
+        for upload in uploads:
+            await upload.close()
+
+
+class _BatchResponse(StreamingResponse):
+    """
+    Starlette's StreamingResponse listens for the disconnect by calling
+    receive() alongside the body iterator, which would swallow request body
+    chunks that receive_uploads is still waiting for. Only start listening once
+    the body has been read.
+    """
+
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+
+def batch_response(request, boundary: bytes) -> StreamingResponse:
+    """NDJSON response streaming the results for the files of a multipart request."""
+    body_read = asyncio.Event()
+    uploads = receive_uploads(request.stream(), boundary, body_read)
+    return _BatchResponse(stream_batch(uploads), body_read, media_type="application/x-ndjson")
+
+
+def iter_pdf_sources(uploads):
+    """
+    Yield (filename, load) for every PDF in the batch, expanding ZIP archives.
+    `load` is a blocking callable returning the PDF bytes, or raising
+    BatchItemError for entries that cannot be imported.
+    """
+    for upload in uploads:
+        name = upload.filename or ""
+        if name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(upload.file)
+            except zipfile.BadZipFile:
+                yield name, _fail("Invalid ZIP archive")
+                continue
+            # not closed here: members may still be loading when the next upload is reached
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                member = f"{name}/{info.filename}"
+                if not info.filename.lower().endswith(".pdf"):
+                    yield member, _fail("Only PDF files allowed")
+                elif info.file_size > MAX_PDF_BYTES:
+                    yield member, _fail(f"Exceeds the {MAX_UPLOAD_MB} MB upload limit")
+                else:
+                    yield member, lambda archive=archive, info=info: archive.read(info)
+        elif name.lower().endswith(".pdf"):
+            yield name, lambda upload=upload: _read_upload(upload)
+        else:
+            yield name, _fail("Only PDF or ZIP files allowed")
+
+
+def _fail(message: str):
+    def load():
+        raise BatchItemError(message)
+    return load
+
+
+def _read_upload(upload) -> bytes:
+    upload.file.seek(0)
+    content = upload.file.read(MAX_PDF_BYTES + 1)
+    # a PDF part is read exactly once: release its spool now, not at the end of the batch
+    upload.file.close()
+    if len(content) > MAX_PDF_BYTES:
+        raise BatchItemError(f"Exceeds the {MAX_UPLOAD_MB} MB upload limit")
+    return content
+
+
+async def extract_one(index: int, filename: str, load) -> dict:
+    result = {"index": index, "filename": filename, "success": False}
+    try:
+        content = await run_in_threadpool(load)
+        data = await cached_extract(content)
+    except BatchItemError as e:
+        result["error"] = str(e)
+    except ExtractionTimeout:
+        result["error"] = "PDF extraction timed out"
+    except Exception as e:
+        print("Batch import error:", filename, e)
+        result["error"] = f"Extraction failed: {e}"
+    else:
+        if data:
+            result.update(success=True, parsed_data=data)
+        else:
+            result["error"] = "Could not extract data"
+    return result
+
+
+async def _pdf_sources(uploads):
+    try:
+        async for upload in uploads:
+            for source in iter_pdf_sources([upload]):
+                yield source
+    finally:
+        # closes the spooled parts now rather than whenever the generator is collected
+        await uploads.aclose()
+
+
+async def stream_batch(uploads, max_in_flight: int = BATCH_MAX_IN_FLIGHT):
+    """
+    Async generator of NDJSON lines, in completion order (each carries its input
+    index). `uploads` is an async generator (see receive_uploads), so results are
+    streamed while later files are still arriving.
+    """
+    sources = _pdf_sources(uploads)
+    next_source = None
+    in_flight = set()
+    index = 0
+
+    try:
+        while True:
+            if next_source is None and sources is not None and len(in_flight) < max_in_flight:
+                next_source = asyncio.ensure_future(sources.__anext__())
+            waiting = (in_flight | {next_source}) if next_source else in_flight
+            if not waiting:
+                break
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            if next_source in done:
+                done.discard(next_source)
+                try:
+                    filename, load = next_source.result()
+                except StopAsyncIteration:
+                    sources = None
+                else:
+                    in_flight.add(asyncio.create_task(extract_one(index, filename, load)))
+                    index += 1
+                next_source = None
+
+            in_flight -= done
+            for t in done:
+                yield json.dumps(t.result(), ensure_ascii=False) + "\n"
+    finally:
+        # client went away: stop work nobody will read
+        for t in in_flight:
+            t.cancel()
+        if next_source is not None:
+            next_source.cancel()
+            await asyncio.gather(next_source, return_exceptions=True)
+        if sources is not None:
+            await sources.aclose()
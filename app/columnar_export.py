@@ -0,0 +1,135 @@
+# app/columnar_export.py
+"""
+Columnar exports for analytics: Apache Parquet or Arrow IPC (stream format)
+with real date / timestamp types, for two tables:
+  policies    one row per record with its current policy (the columns of
+              export_selected_csv, plus id and updated_at)
+  insurances  the full `insurances` history flattened, one row per policy
+Rows are turned into one Arrow record batch per EXPORT_BATCH_SIZE rows as the
+cursor is read, and each encoded batch is streamed out before the next one is
+built, so memory stays bounded by a batch. Encoding (Parquet compression in
+particular) runs in the threadpool, off the event loop.
+"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+from starlette.concurrency import run_in_threadpool
+
+from .exports import EXPORT_BATCH_SIZE
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+POLICIES_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("name", pa.string()),
+    ("phone", pa.string()),
+    ("car_name", pa.string()),
+    ("plate_number", pa.string()),
+    ("vin_number", pa.string()),
+    ("insurance_start", pa.date32()),
+    ("insurance_end", pa.date32()),
+    ("updated_at", pa.timestamp("ms", tz="UTC")),
+])
+
+INSURANCES_SCHEMA = pa.schema([
+    ("record_id", pa.string()),
+    ("name", pa.string()),
+    ("plate_number", pa.string()),
+    ("vin_number", pa.string()),
+    ("seq", pa.int32()),  # position in the record's history, 0 = first policy
+    ("insurance_start", pa.date32()),
+    ("insurance_end", pa.date32()),
+    ("created_at", pa.timestamp("ms", tz="UTC")),
+    ("is_current", pa.bool_()),
+])
+
+_BASE_PROJECTION = {"name": 1, "plate_number": 1, "vin_number": 1}
+
+
+def _date(value):
+    return value.date() if value else None
+
+
+def _policy_rows(d: dict):
+    ins = d.get("current_insurance") or {}
+    yield (str(d["_id"]), d.get("name"), d.get("phone"), d.get("car_name"), d.get("plate_number"),
+           d.get("vin_number"), _date(ins.get("insurance_start")), _date(ins.get("insurance_end")),
+           d.get("updated_at"))
+
+
+def _insurance_rows(d: dict):
+    history = d.get("insurances") or []
+    for seq, ins in enumerate(history):
+        yield (str(d["_id"]), d.get("name"), d.get("plate_number"), d.get("vin_number"), seq,
+               _date(ins.get("insurance_start")), _date(ins.get("insurance_end")), ins.get("created_at"),
+               seq == len(history) - 1)
+
+
+# table -> (schema, records projection, rows of one record)
+TABLES = {
+    "policies": (POLICIES_SCHEMA,
+                 {**_BASE_PROJECTION, "phone": 1, "car_name": 1, "current_insurance": 1, "updated_at": 1},
+                 _policy_rows),
+    "insurances": (INSURANCES_SCHEMA, {**_BASE_PROJECTION, "insurances": 1}, _insurance_rows),
+}
+
+
+class _ChunkSink:
+    """Write-only file object the Arrow writers write into; drained after every batch."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _batch(schema: pa.Schema, rows: list) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=f.type) for column, f in zip(columns, schema)], schema=schema)
+
+
+def _write(writer, schema: pa.Schema, rows: list):
+    writer.write_batch(_batch(schema, rows))
+
+
+async def columnar_chunks(records, table: str, fmt: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """Async generator of the encoded file: one chunk per record batch (plus header / footer)."""
+    schema, _, rows_of = TABLES[table]
+    sink = _ChunkSink()
+    out = pa.PythonFile(sink, mode="w")
+    writer = pq.ParquetWriter(out, schema) if fmt == "parquet" else pa.ipc.new_stream(out, schema)
+
+    rows = []
+    async for d in records:
+        rows.extend(rows_of(d))
+        if len(rows) >= batch_size:
+            await run_in_threadpool(_write, writer, schema, rows)
+            rows = []
+            yield sink.take()
+    if rows:
+        await run_in_threadpool(_write, writer, schema, rows)
+    await run_in_threadpool(writer.close)
+    yield sink.take()
@@ -0,0 +1,105 @@
+# app/dashboard.py
+from datetime import datetime, timedelta
+from bson import ObjectId
+from bson.errors import InvalidId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# ---------- KEYSET CURSORS ----------
+def encode_cursor(doc) -> str:
+    """Opaque page cursor for a record: '<created_at ms>-<_id>'."""
+    ms = (doc["created_at"] - EPOCH) // timedelta(milliseconds=1)
+    return f"{ms}-{doc['_id']}"
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; returns (created_at, ObjectId) or None if malformed."""
+    try:
+        ms, oid = cursor.split("-", 1)
+        return EPOCH + timedelta(milliseconds=int(ms)), ObjectId(oid)
+    except (ValueError, InvalidId):
+        return None
+
+
+def keyset_filter(created_at, oid, direction: int) -> dict:
+    """
+    Records strictly after (created_at, _id) in the given sort direction.
+    direction=-1 walks towards older records, direction=1 towards newer ones.
+    """
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [
+        {"created_at": {op: created_at}},
+        {"created_at": created_at, "_id": {op: oid}},
+    ]}
+
+
+# ---------- PAGE QUERY ----------
+def _date_str(expr):
+    return {"$dateToString": {"date": expr, "format": "%Y-%m-%d", "onNull": ""}}
+
+
+def dashboard_projection(today: datetime) -> list:
+    """
+    Stages that turn a raw record into a dashboard row inside Mongo:
+    only displayed fields travel over the wire, and dates / days_left are
+    computed server-side from the denormalized current_insurance.
+    """
+    return [
+        {"$project": {
+            "_id": 1,
+            "created_at": 1,
+            "id": {"$toString": "$_id"},
+            "name": 1,
+            "phone": 1,
+            "car_name": 1,
+            "plate_number": 1,
+            "vin_number": 1,
+            "insurance_start": _date_str("$current_insurance.insurance_start"),
+            "insurance_end": _date_str("$current_insurance.insurance_end"),
+            "days_left": {"$cond": [
+                {"$ifNull": ["$current_insurance.insurance_end", False]},
+                {"$dateDiff": {"startDate": today, "endDate": "$current_insurance.insurance_end", "unit": "day"}},
+                None,
+            ]},
+            "pdf_id": {"$toString": {"$arrayElemAt": ["$documents.file_id", -1]}},
+        }},
+    ]
+
+
+async def fetch_page(col, page_size: int, after: str = None, before: str = None, today: datetime = None):
+    """
+    Read a single dashboard page ordered by (created_at, _id) descending.
+    Returns (rows, next_cursor, prev_cursor); cursors are None at either end.
+    Backed by the {created_at: -1, _id: -1} index.
+    """
+    query, direction = {}, -1
+    if after and (key := decode_cursor(after)):
+        query = keyset_filter(*key, direction=-1)
+    elif before and (key := decode_cursor(before)):
+        query, direction = keyset_filter(*key, direction=1), 1
+
+    today = today or datetime.utcnow()
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"created_at": direction, "_id": direction}},
+        # one extra row tells us whether another page exists
+        {"$limit": page_size + 1},
+        *dashboard_projection(today),
+    ]
+    docs = await col.aggregate(pipeline).to_list(length=page_size + 1)
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+
+    if direction == 1:
+        docs.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = bool(query), has_more
+
+    next_cursor = encode_cursor(docs[-1]) if docs and has_older else None
+    prev_cursor = encode_cursor(docs[0]) if docs and has_newer else None
+    return docs, next_cursor, prev_cursor
@@ -10,4 +10,5 @@ client = AsyncIOMotorClient(MONGO_URI)
 db = client.get_default_database()  # "insurance" if using URI above
 records_col = db["insurance_records"]
 audit_col = db["audit_logs"]
-fs_bucket = None  # set in main at startup (GridFSBucket)
+files_col = db["fs.files"]  # GridFS file documents (default bucket)
+fs_bucket = None  # set in main at startup (AsyncIOMotorGridFSBucket)
@@ -0,0 +1,83 @@
+# app/drafts.py
+"""
+Import-and-save in one round trip: an imported PDF is stored in GridFS once,
+fields are extracted from the stored copy, and the result is kept as a draft
+until the confirm form (/add with draft_id) turns it into a record. The
+document reference held by the draft moves to the record, so the PDF is never
+uploaded a second time.
+
+Drafts that are never confirmed are dropped by expire_drafts() after
+DRAFT_TTL_HOURS, releasing their document references (a TTL index would
+delete the draft but leak the GridFS file).
+"""
+import os
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from .database import db
+from .extraction_cache import cached_extract_stored
+from .storage import store_upload, read_document, release_documents
+
+DRAFT_TTL_HOURS = int(os.getenv("DRAFT_TTL_HOURS", "24"))
+
+drafts_col = db["record_drafts"]
+
+
+async def create_draft(bucket, upload):
+    """
+    Store the upload, extract from the stored copy and save a draft.
+    Returns (draft_id, parsed_data), or (None, {}) when nothing could be
+    extracted (the stored document is released again in that case).
+    """
+    document = await store_upload(bucket, upload)
+    draft_id = None
+    try:
+        draft_id, data = await draft_from_document(bucket, document)
+        return draft_id, data
+    finally:
+        # released exactly once: on failure, or when nothing was extracted
+        if draft_id is None:
+            await release_documents(bucket, [document["file_id"]])
+
+
+async def draft_from_document(bucket, document: dict):
+    """
+    Extract from a document entry already stored in GridFS and save it as a draft.
+    On success the caller's reference moves to the draft; otherwise ((None, {})
+    or an exception) the caller still owns it.
+    """
+    # a known PDF is answered from the cache without reading it back from GridFS
+    data = await cached_extract_stored(document["sha256"], lambda: read_document(bucket, document["file_id"]))
+    if not data:
+        return None, {}
+    result = await drafts_col.insert_one({
+        "documents": [document],
+        "parsed_data": data,
+        "created_at": datetime.utcnow(),
+    })
+    return str(result.inserted_id), data
+
+
+async def claim_draft(draft_id: str):
+    """Remove a draft and hand over its documents; None if it expired or was already used."""
+    try:
+        oid = ObjectId(draft_id)
+    except InvalidId:
+        return None
+    draft = await drafts_col.find_one_and_delete({"_id": oid}, projection={"documents": 1})
+    return draft["documents"] if draft else None
+
+
+async def expire_drafts(bucket, ttl_hours: int = DRAFT_TTL_HOURS) -> int:
+    """Delete drafts older than ttl_hours and release their documents."""
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    expired = 0
+    async for draft in drafts_col.find({"created_at": {"$lt": cutoff}}, {"_id": 1}):
+        # claim before releasing, so a draft confirmed meanwhile is left alone
+        documents = await claim_draft(str(draft["_id"]))
+        if documents:
+            await release_documents(bucket, [d["file_id"] for d in documents])
+            expired += 1
+    return expired
@@ -18,7 +18,7 @@ def send_email_alert(items):
         subject = "🚨 Insurance Expiration Alert - 7 Days Remaining"
         html_body = """
         <h2 style="color:#d9534f;">Upcoming Insurance Expirations</h2>
-        <p>The following insurance policies will expire within 7 days:</p>
+        <p>The following insurance policies will expire within 7 days or have already expired:</p>
         <table border="1" cellpadding="6" cellspacing="0" style="border-collapse:collapse;">
             <tr style="background:#f2f2f2;">
                 <th>Name</th><th>Car</th><th>Plate</th><th>End Date</th><th>Days Left</th>
@@ -0,0 +1,82 @@
+# app/exports.py
+"""Column layout of the record exports, shared by the export routes and export jobs."""
+import csv
+import os
+import zlib
+from io import StringIO
+
+# rows per Mongo batch and per streamed chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+CSV_HEADER = ["Name", "Phone", "Car", "Plate", "VIN", "Start", "End"]
+# only what the columns need
+CSV_PROJECTION = {"name": 1, "phone": 1, "car_name": 1, "plate_number": 1, "vin_number": 1, "current_insurance": 1}
+
+
+# full export (/export_csv): the same columns plus what an incremental consumer merges on;
+# since= exports end with one tombstone row (Deleted = true) per record deleted since
+FULL_CSV_HEADER = CSV_HEADER + ["ID", "Updated", "Deleted"]
+FULL_CSV_PROJECTION = {**CSV_PROJECTION, "updated_at": 1}
+
+
+def _date(value) -> str:
+    return value.strftime("%Y-%m-%d") if value else ""
+
+
+def _timestamp(value) -> str:
+    return value.isoformat(timespec="milliseconds") + "Z" if value else ""
+
+
+def csv_row(d: dict) -> list:
+    ins = d.get("current_insurance") or {}
+    return [
+        d.get("name", ""),
+        d.get("phone", ""),
+        d.get("car_name", ""),
+        d.get("plate_number", ""),
+        d.get("vin_number", ""),
+        _date(ins.get("insurance_start")),
+        _date(ins.get("insurance_end")),
+    ]
+
+
+def full_csv_row(d: dict) -> list:
+    if "deleted_at" in d:
+        # tombstone: only the id and when it was deleted
+        return [""] * len(CSV_HEADER) + [str(d["_id"]), _timestamp(d["deleted_at"]), "true"]
+    return csv_row(d) + [str(d["_id"]), _timestamp(d.get("updated_at")), ""]
+
+
+async def csv_chunks(cursor, batch_size: int = EXPORT_BATCH_SIZE, on_batch=None,
+                     header: list = CSV_HEADER, row=csv_row):
+    """
+    Async generator of CSV text (header first), one chunk per `batch_size` rows,
+    so only one batch is ever held in memory. on_batch(rows_so_far) is awaited
+    after each chunk (job progress).
+    """
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    rows = 0
+    async for d in cursor:
+        writer.writerow(row(d))
+        rows += 1
+        if rows % batch_size == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+            if on_batch:
+                await on_batch(rows)
+    yield out.getvalue()
+    if on_batch:
+        await on_batch(rows)
+
+
+async def gzip_chunks(chunks):
+    """gzip-compress a stream of str chunks on the fly (one compressor, no buffering of the whole file)."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
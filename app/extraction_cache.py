@@ -0,0 +1,105 @@
+# app/extraction_cache.py
+"""
+Cache of extract_insurance_data results keyed by SHA-256 of the PDF bytes and
+EXTRACTOR_VERSION: an in-process LRU in front of the `extraction_cache`
+collection. Bumping EXTRACTOR_VERSION changes every key, so results of an
+older extractor are never served (stale rows expire through a TTL index).
+The cache is best effort: a Mongo error counts as a miss and is only logged.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import datetime
+
+from pymongo.errors import PyMongoError
+from starlette.concurrency import run_in_threadpool
+
+from .database import db
+from .extraction_pool import extraction_pool
+from .extractor import EXTRACTOR_VERSION
+
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "1024"))
+EXTRACTION_CACHE_TTL_DAYS = int(os.getenv("EXTRACTION_CACHE_TTL_DAYS", "180"))
+
+cache_col = db["extraction_cache"]
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+_memory = LRUCache(EXTRACTION_CACHE_SIZE)
+
+
+def cache_key(sha256: str, version: int = EXTRACTOR_VERSION) -> str:
+    return f"{sha256}:v{version}"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def _lookup(key: str):
+    data = _memory.get(key)
+    if data is not None:
+        return dict(data)
+    try:
+        doc = await cache_col.find_one({"_id": key}, {"data": 1})
+    except PyMongoError as e:
+        print(f"⚠️ Extraction cache lookup failed, extracting: {e}")
+        return None
+    if doc:
+        _memory.put(key, doc["data"])
+        return dict(doc["data"])
+    return None
+
+
+async def _extract_and_store(key: str, pdf_bytes: bytes) -> dict:
+    data = await extraction_pool.extract(pdf_bytes)
+    if data:
+        _memory.put(key, data)
+        try:
+            await cache_col.replace_one(
+                {"_id": key},
+                {"data": data, "version": EXTRACTOR_VERSION, "created_at": datetime.utcnow()},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            print(f"⚠️ Extraction cache store failed: {e}")
+    return data
+
+
+async def cached_extract(pdf_bytes: bytes, sha256: str = None) -> dict:
+    """extract_insurance_data through the cache; only successful extractions are stored."""
+    # hashing a 25 MB upload takes tens of ms, keep it off the event loop
+    key = cache_key(sha256 or await run_in_threadpool(_sha256, pdf_bytes))
+    data = await _lookup(key)
+    if data is not None:
+        return data
+    return await _extract_and_store(key, pdf_bytes)
+
+
+async def cached_extract_stored(sha256: str, read) -> dict:
+    """
+    cached_extract for a document already stored under its digest: the content
+    (`await read()`) is only fetched when the cache misses.
+    """
+    key = cache_key(sha256)
+    data = await _lookup(key)
+    if data is not None:
+        return data
+    return await _extract_and_store(key, await read())
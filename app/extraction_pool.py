@@ -0,0 +1,145 @@
+# app/extraction_pool.py
+"""
+Process pool for PDF field extraction, so PyMuPDF parsing and the regex passes
+never run on the event loop.
+
+Configuration (env):
+  EXTRACT_WORKERS              worker processes (default: CPU count)
+  EXTRACT_MAX_TASKS_PER_CHILD  recycle a worker after this many documents (default 50)
+  EXTRACT_TIMEOUT              seconds allowed per document (default 30)
+
+At most EXTRACT_WORKERS documents are submitted at once, so the timeout only
+covers time spent running, never time queued behind other documents. It is
+enforced inside the worker with SIGALRM: only the overrunning document fails
+and the worker survives. A worker that ignores the alarm (stuck in native
+code) makes the pool restart after EXTRACT_TIMEOUT_GRACE more seconds.
+"""
+import asyncio
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .extractor import extract_insurance_data
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+EXTRACT_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACT_MAX_TASKS_PER_CHILD", "50"))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+EXTRACT_TIMEOUT_GRACE = float(os.getenv("EXTRACT_TIMEOUT_GRACE", "5"))
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("extraction timed out")
+
+
+def _run_with_alarm(timeout: float, fn, *args):
+    """Runs in the worker: fn(*args), interrupted by SIGALRM after `timeout` seconds."""
+    if not hasattr(signal, "setitimer"):  # Windows: only the pool-level timeout applies
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class ExtractionPool:
+    def __init__(self, workers: int = EXTRACT_WORKERS, max_tasks_per_child: int = EXTRACT_MAX_TASKS_PER_CHILD,
+                 timeout: float = EXTRACT_TIMEOUT, grace: float = EXTRACT_TIMEOUT_GRACE):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self.grace = grace
+        self._executor = None
+        # one slot per worker: documents beyond that wait here, outside the timeout
+        self._slots = asyncio.Semaphore(workers)
+        self.pending = 0      # submitted and not finished yet (running + queued)
+        # outcomes of finished documents
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # max_tasks_per_child implies the "spawn" start method, so workers
+            # import only app.extractor, not the web app
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Kill a pool with a worker stuck past the alarm; a fresh one is created on next use."""
+        if self._executor is not executor:
+            return  # somebody already replaced it
+        self._executor = None
+        self.restarts += 1
+        # a hung worker cannot be cancelled, only terminated; the executor then
+        # fails the other in-flight documents with BrokenProcessPool and run() retries them
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in a worker, retrying once if a stuck worker's restart killed the pool."""
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            async with self._slots:
+                for attempt in range(2):
+                    executor = self._get_executor()
+                    future = loop.run_in_executor(executor, _run_with_alarm, self.timeout, fn, *args)
+                    try:
+                        result = await asyncio.wait_for(future, self.timeout + self.grace)
+                    except ExtractionTimeout:
+                        self.timed_out += 1
+                        raise ExtractionTimeout(f"extraction exceeded {self.timeout:.0f}s")
+                    except asyncio.TimeoutError:
+                        # the worker did not answer its alarm
+                        self.timed_out += 1
+                        self._restart(executor)
+                        raise ExtractionTimeout(f"extraction exceeded {self.timeout:.0f}s")
+                    except BrokenProcessPool:
+                        self._restart(executor)
+                        if attempt:
+                            self.failed += 1
+                            raise
+                    except Exception:
+                        self.failed += 1
+                        raise
+                    else:
+                        self.completed += 1
+                        return result
+        finally:
+            self.pending -= 1
+
+    async def extract(self, pdf_bytes: bytes) -> dict:
+        return await self.run(extract_insurance_data, pdf_bytes)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            # documents waiting for a free worker
+            "queue_depth": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "restarts": self.restarts,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+extraction_pool = ExtractionPool()
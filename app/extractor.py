@@ -0,0 +1,291 @@
+# app/extractor.py
+"""
+Rule-based field extraction from Romanian insurance policy PDFs.
+
+Patterns are compiled once at import time and every field is produced by a
+rule registered on the module-level `extractor`. Adding a field means writing
+a function that takes the parsed PolicyText and returns ({field: value},
+confident), decorating it with @extractor.rule("field_name"), and listing
+its labels in LABEL_GROUPS.
+
+Labels are resolved spatially (app.word_index): a field's value is the text
+right of its label on the same line, or on the lines just below it.
+
+Known insurer layouts (see app.layouts) are recognised from page 1 and their
+fields read straight from the template; anything a template does not cover,
+or that fails validation, goes through the generic rules.
+
+Pages are read one at a time; rules are re-run on the text read so far until
+every rule is confident (then the rest of the PDF, typically pages of general
+conditions, is never parsed) or EXTRACT_MAX_PAGES is reached.
+"""
+import os
+import re
+from datetime import datetime
+
+import fitz
+
+from .layouts import layout_registry
+from .label_scanner import LabelScanner
+from .word_index import WordIndex
+
+# bump whenever the rules may produce different output for the same PDF
+RULES_VERSION = 8
+# registered layout templates change output too
+EXTRACTOR_VERSION = f"{RULES_VERSION}.{layout_registry.digest}"
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "10"))
+
+WS_RE = re.compile(r"\s+")
+NON_ALNUM_RE = re.compile(r"[^A-Z0-9]")
+# VIN is 17 chars, excludes I,O,Q
+VIN_RE = re.compile(r"\b([A-HJ-NPR-Z0-9]{17})\b")
+# AA 99 AAA or B 99 AAA (spaces optional in PDF)
+PLATE_RE = re.compile(r"\b((?:[A-Z]{2}\s?\d{2,3}\s?[A-Z]{3})|(?:B\s?\d{2,3}\s?[A-Z]{3}))\b")
+PLATE_B_RE = re.compile(r"^B(\d{2,3})([A-Z]{3})$")
+PLATE_COUNTY_RE = re.compile(r"^([A-Z]{2})(\d{2,3})([A-Z]{3})$")
+DATE_RE = re.compile(r"(\d{2}[./-]\d{2}[./-]\d{4})")
+DATE_FROM_RE = re.compile(r"de la\s*(\d{2}[./-]\d{2}[./-]\d{4})", re.IGNORECASE)
+DATE_UNTIL_RE = re.compile(r"p[aăâ]n[ăa]\s*la\s*(\d{2}[./-]\d{2}[./-]\d{4})", re.IGNORECASE)
+CAP_WORD = r"[A-ZĂÂÎȘȚ][A-ZĂÂÎȘȚ\-']+"
+# 2–4 consecutive uppercase words on one line (with diacritics allowed)
+NAME_NEAR_LABEL_RE = re.compile(rf"({CAP_WORD}(?: +{CAP_WORD}){{1,3}})")
+NAME_ANYWHERE_RE = re.compile(rf"\b({CAP_WORD}\s+{CAP_WORD}(?:\s+{CAP_WORD})?)\b")
+
+DATE_FORMATS = ("%d.%m.%Y", "%d-%m-%Y", "%d/%m/%Y")
+
+# labels per rule, in priority order; diacritic-free spellings match too
+LABEL_GROUPS = {
+    "name": ["asigurat", "proprietar", "utilizator", "asigurat proprietar"],
+    "vin": ["VIN", "Serie șasiu", "Serie CIV", "Serie"],
+    "plate": ["nr. înmatriculare", "număr înmatriculare", "înregistrare"],
+    "period": ["valabilitate contract", "perioada de asigurare", "valabilitate"],
+}
+# one automaton for every label, built once per process
+label_scanner = LabelScanner(LABEL_GROUPS)
+
+
+# ---------- helpers ----------
+def norm_ws(s: str) -> str:
+    return WS_RE.sub(" ", s).strip()
+
+
+def to_iso(d: str) -> str:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(d, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return ""
+
+
+def normalize_plate(p: str) -> str:
+    """Re-space a plate as 'B 99 ABC' / 'AA 99 ABC' when it has a Romanian shape."""
+    p = NON_ALNUM_RE.sub("", p.upper())
+    if len(p) in (7, 8):  # common lengths after removing spaces
+        # one-letter county: B + 2/3 digits + 3 letters
+        if p.startswith("B"):
+            m = PLATE_B_RE.match(p)
+            if m:
+                return f"B {m.group(1)} {m.group(2)}"
+        m = PLATE_COUNTY_RE.match(p)
+        if m:
+            return f"{m.group(1)} {m.group(2)} {m.group(3)}"
+    return p  # fallback
+
+
+# ---------- parsed document ----------
+class PolicyText:
+    """Pages read so far: reading-order text plus a spatial word index per page."""
+
+    def __init__(self):
+        self.pages = 0
+        self.indexes = []
+        self.labels = []  # per page: {group: [(priority, first_word, last_word)]}
+        self._flat = ""
+        self._flat_pages = 0
+
+    def add_page(self, page, words: list = None):
+        """Index one page; `words` may be its get_text('words') when the caller already has them."""
+        index = WordIndex(page.get_text("words") if words is None else words)
+        self.indexes.append(index)
+        # a single pass finds the labels of every rule on this page
+        self.labels.append(label_scanner.scan(index.words))
+        self.pages += 1
+
+    @property
+    def flat(self) -> str:
+        """Reading-order text of the pages read so far; built on first use (only fallbacks need it)."""
+        for index in self.indexes[self._flat_pages:]:
+            text = " ".join(t for t in (norm_ws(b) for b in index.blocks()) if t)
+            if text:
+                self._flat = f"{self._flat} {text}" if self._flat else text
+        self._flat_pages = self.pages
+        return self._flat
+
+    def near(self, group: str) -> str:
+        """Value text right of / below the best label of a LABEL_GROUPS group (priority, then position)."""
+        best = None
+        for page_no, (index, hits) in enumerate(zip(self.indexes, self.labels)):
+            for priority, first, last in hits.get(group, ()):
+                w = index.words[first]
+                key = (priority, page_no, w[1], w[0])
+                if best is None or key < best[0]:
+                    best = (key, index, first, last)
+        if best is None:
+            return ""
+        _, index, first, last = best
+        return index.value_near(index.box(first, last))
+
+
+# ---------- engine ----------
+class InsuranceExtractor:
+    def __init__(self, max_pages: int = EXTRACT_MAX_PAGES):
+        self.max_pages = max_pages
+        self.rules = []  # (fields, fn) in registration order
+
+    def rule(self, *fields):
+        """Register fn(PolicyText) -> ({field: value}, confident) as the producer of `fields`."""
+        def register(fn):
+            self.rules.append((fields, fn))
+            return fn
+        return register
+
+    @property
+    def fields(self) -> list:
+        return [f for fields, _ in self.rules for f in fields]
+
+    def extract(self, pdf_bytes: bytes) -> dict:
+        try:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+                return self.extract_pages(pdf)
+        except Exception as e:
+            print("PDF parse error:", e)
+            return {}
+
+    def extract_pages(self, pdf, use_templates: bool = True) -> dict:
+        templated, first_words = {}, None
+        if use_templates and layout_registry.templates and len(pdf):
+            # page 1 is parsed once, for the fingerprint, the template fields and the rules
+            first = pdf[0]
+            textpage = first.get_textpage()
+            first_words = first.get_text("words", textpage=textpage)
+            templated = self.template_values(pdf, first, first_words, textpage)
+        # rules without a confident answer yet
+        pending = [(fields, fn) for fields, fn in self.rules if not all(f in templated for f in fields)]
+
+        doc = PolicyText()
+        result = {}
+        for page in pdf:
+            # everything found with confidence: skip remaining pages
+            if not pending or doc.pages >= self.max_pages:
+                break
+            doc.add_page(page, first_words if doc.pages == 0 else None)
+            pending = self._run_rules(pending, doc, result)
+        result.update(templated)
+        return {f: result.get(f, "") for f in self.fields}
+
+    @staticmethod
+    def template_values(pdf, first=None, first_words: list = None, textpage=None) -> dict:
+        """
+        Fields of a known layout that parse as valid values (empty for unknown layouts).
+        first / first_words / textpage: page 1 with its words and TextPage, when the caller has them.
+        """
+        if not len(pdf) or not layout_registry.templates:
+            return {}
+        template = layout_registry.match(first if first is not None else pdf[0], textpage)
+        if template is None:
+            return {}
+        values = {}
+        known = {0: first_words} if first_words is not None else None
+        for field, raw in template.raw_values(pdf, known).items():
+            parser = FIELD_PARSERS.get(field)
+            value = parser(raw) if parser else raw.strip()
+            if value:
+                values[field] = value
+        return values
+
+    @staticmethod
+    def _run_rules(rules, doc: PolicyText, result: dict) -> list:
+        unresolved = []
+        for fields, fn in rules:
+            values, confident = fn(doc)
+            for f in fields:
+                result[f] = (values.get(f) or "").strip()
+            if not confident:
+                unresolved.append((fields, fn))
+        return unresolved
+
+
+extractor = InsuranceExtractor()
+
+
+# ---------- field rules ----------
+@extractor.rule("name")
+def name_rule(doc: PolicyText):
+    # search near common labels, prefer ALLCAPS tokens
+    m = NAME_NEAR_LABEL_RE.search(doc.near("name"))
+    if m:
+        return {"name": m.group(1)}, True
+    # secondary: generic full name pattern anywhere
+    m = NAME_ANYWHERE_RE.search(doc.flat)
+    return {"name": m.group(1) if m else ""}, False
+
+
+@extractor.rule("vin_number")
+def vin_rule(doc: PolicyText):
+    # next to its label first; a global search is very reliable as the fallback
+    m = VIN_RE.search(doc.near("vin")) or VIN_RE.search(doc.flat)
+    return {"vin_number": m.group(1) if m else ""}, bool(m)
+
+
+@extractor.rule("plate_number")
+def plate_rule(doc: PolicyText):
+    m = PLATE_RE.search(doc.near("plate")) or PLATE_RE.search(doc.flat)
+    return {"plate_number": normalize_plate(m.group(1)) if m else ""}, bool(m)
+
+
+@extractor.rule("insurance_start", "insurance_end")
+def period_rule(doc: PolicyText):
+    # prefer "de la ... / până la ..." within the validity window
+    window = doc.near("period")
+    m1 = DATE_FROM_RE.search(window)
+    m2 = DATE_UNTIL_RE.search(window)
+    start = to_iso(m1.group(1)) if m1 else ""
+    end = to_iso(m2.group(1)) if m2 else ""
+    if start and end:
+        return {"insurance_start": start, "insurance_end": end}, True
+
+    # fallback: earliest date as start, latest as end
+    parsed = sorted({iso for d in DATE_RE.findall(doc.flat) if (iso := to_iso(d))})
+    if parsed:
+        if not start:
+            start = parsed[0]
+        if not end and len(parsed) > 1:
+            end = parsed[-1]
+    return {"insurance_start": start, "insurance_end": end}, False
+
+
+# ---------- template field parsers ----------
+def _first(pattern, transform=lambda v: v):
+    def parse(text: str) -> str:
+        m = pattern.search(text)
+        return transform(m.group(1)) if m else ""
+    return parse
+
+
+# how raw text read from a template location becomes a validated field value
+FIELD_PARSERS = {
+    "name": _first(NAME_NEAR_LABEL_RE),
+    "vin_number": _first(VIN_RE),
+    "plate_number": _first(PLATE_RE, normalize_plate),
+    "insurance_start": _first(DATE_RE, to_iso),
+    "insurance_end": _first(DATE_RE, to_iso),
+}
+
+
+def extract_insurance_data(pdf_bytes: bytes) -> dict:
+    """
+    Robust extractor for: name, VIN, plate, start_date, end_date
+    Works across multiple Romanian policy layouts (multi-column, different labels).
+    """
+    return extractor.extract(pdf_bytes)
@@ -0,0 +1,226 @@
+# app/indexes.py
+"""
+Index registry. Every index the app's queries rely on is declared here and
+applied idempotently at startup by ensure_indexes().
+
+INDEX_STRICT=true makes startup fail when a required index cannot be built,
+or exists with other keys / options than registered; otherwise problems are
+only logged. A changed TTL is applied in place.
+"""
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from pymongo.errors import PyMongoError
+
+from .database import db, records_col, audit_col
+from .dashboard import dashboard_projection
+from .extraction_cache import cache_col, EXTRACTION_CACHE_TTL_DAYS
+from .drafts import drafts_col
+from .jobs import jobs_col
+from .records import deleted_records_col, TOMBSTONE_TTL_DAYS
+from .selections import selections_col, selection_items_col, SELECTION_TTL_HOURS
+
+INDEX_STRICT = os.getenv("INDEX_STRICT", "false").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: list
+    name: str
+    required: bool = True
+    options: dict = field(default_factory=dict)
+
+
+INDEXES = [
+    # dashboard keyset pagination
+    IndexSpec(records_col.name, [("created_at", -1), ("_id", -1)], "created_at_id_desc"),
+    # expiry cron / expiry sorts
+    IndexSpec(records_col.name, [("next_expiry", 1)], "next_expiry"),
+    # history lookups on older policies
+    IndexSpec(records_col.name, [("insurances.insurance_end", 1)], "insurances_insurance_end", required=False),
+    IndexSpec(records_col.name, [("plate_number", 1)], "plate_number"),
+    IndexSpec(records_col.name, [("vin_number", 1)], "vin_number"),
+    # full / incremental (since=) CSV export order
+    IndexSpec(records_col.name, [("updated_at", 1), ("_id", 1)], "updated_at_id"),
+    # deletions reported by since= exports; tombstones expire
+    IndexSpec(deleted_records_col.name, [("deleted_at", 1)], "deleted_at_ttl", required=False,
+              options={"expireAfterSeconds": TOMBSTONE_TTL_DAYS * 86400}),
+    # audit page, newest first
+    IndexSpec(audit_col.name, [("timestamp", -1)], "timestamp_desc"),
+    # GridFS (same names the drivers use, so they are never duplicated)
+    IndexSpec("fs.files", [("filename", 1), ("uploadDate", 1)], "filename_1_uploadDate_1"),
+    IndexSpec("fs.chunks", [("files_id", 1), ("n", 1)], "files_id_1_n_1", options={"unique": True}),
+    # content-addressed document dedup: one live copy per digest (python -m app.migrations
+    # merges copies stored before this index existed)
+    IndexSpec("fs.files", [("metadata.sha256", 1)], "metadata_sha256_live", options={
+        "unique": True,
+        "partialFilterExpression": {"metadata.sha256": {"$exists": True}, "metadata.refs": {"$gt": 0}},
+    }),
+    # download filename lookup (records sharing a stored file)
+    IndexSpec(records_col.name, [("documents.file_id", 1)], "documents_file_id", required=False),
+    # extraction results of old extractor versions age out
+    IndexSpec(cache_col.name, [("created_at", 1)], "created_at_ttl", required=False,
+              options={"expireAfterSeconds": EXTRACTION_CACHE_TTL_DAYS * 86400}),
+    # hourly sweep of unconfirmed import drafts
+    IndexSpec(drafts_col.name, [("created_at", 1)], "created_at", required=False),
+    # job queue: workers claim the oldest runnable job by status
+    IndexSpec(jobs_col.name, [("status", 1), ("created_at", 1)], "status_created_at"),
+    # selection members, walked in record_id order; selections expire
+    IndexSpec(selection_items_col.name, [("selection_id", 1), ("record_id", 1)], "selection_id_record_id"),
+    IndexSpec(selection_items_col.name, [("created_at", 1)], "created_at_ttl", required=False,
+              options={"expireAfterSeconds": SELECTION_TTL_HOURS * 3600}),
+    IndexSpec(selections_col.name, [("created_at", 1)], "created_at_ttl", required=False,
+              options={"expireAfterSeconds": SELECTION_TTL_HOURS * 3600}),
+]
+
+
+# ---------- BOOTSTRAP ----------
+# options compared with the live index; a changed TTL is applied in place with
+# collMod, any other difference needs the index rebuilt by hand
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _find_index(existing: dict, spec: IndexSpec):
+    """Name of the live index for a spec: same name, or identical key pattern (built by hand)."""
+    if spec.name in existing:
+        return spec.name
+    wanted = [(k, d) for k, d in spec.keys]
+    return next((name for name, info in existing.items() if [(k, d) for k, d in info["key"]] == wanted), None)
+
+
+def _option_value(source: dict, option: str):
+    value = source.get(option)
+    if option in ("unique", "sparse"):
+        return bool(value)
+    return dict(value) if option == "partialFilterExpression" and value else value
+
+
+def _differences(info: dict, spec: IndexSpec) -> dict:
+    """{what: (live, wanted)} for every key / option where the live index differs from the spec."""
+    diffs = {}
+    live_keys, wanted_keys = [(k, d) for k, d in info["key"]], [(k, d) for k, d in spec.keys]
+    if live_keys != wanted_keys:
+        diffs["key"] = (live_keys, wanted_keys)
+    for option in _COMPARED_OPTIONS:
+        live, wanted = _option_value(info, option), _option_value(spec.options, option)
+        if live != wanted:
+            diffs[option] = (live, wanted)
+    return diffs
+
+
+async def _build(col, spec: IndexSpec) -> bool:
+    print(f"⏳ Building index {spec.collection}.{spec.name} {spec.keys}...")
+    started = time.monotonic()
+    try:
+        await col.create_index(spec.keys, name=spec.name, **spec.options)
+    except PyMongoError as e:
+        print(f"❌ Failed to build index {spec.collection}.{spec.name}: {e}")
+        return False
+    print(f"✅ Built index {spec.collection}.{spec.name} in {time.monotonic() - started:.1f}s")
+    return True
+
+
+async def _reconcile(spec: IndexSpec, name: str, diffs: dict) -> bool:
+    """Bring a live index in line with its spec where that can be done in place (TTL only)."""
+    if set(diffs) != {"expireAfterSeconds"} or diffs["expireAfterSeconds"][0] is None:
+        print(f"❌ Index {spec.collection}.{name} differs from the registry, rebuild it: "
+              + ", ".join(f"{what} {live!r} != {wanted!r}" for what, (live, wanted) in diffs.items()))
+        return False
+    seconds = diffs["expireAfterSeconds"][1]
+    try:
+        await db.command({"collMod": spec.collection, "index": {"name": name, "expireAfterSeconds": seconds}})
+    except PyMongoError as e:
+        print(f"❌ Failed to change TTL of {spec.collection}.{name}: {e}")
+        return False
+    print(f"✅ Changed TTL of {spec.collection}.{name} to {seconds}s")
+    return True
+
+
+async def ensure_indexes(strict: bool = INDEX_STRICT):
+    """
+    Create every registered index that does not exist yet and check the
+    options of those that do; safe to run on each startup.
+    """
+    problems = []
+    for spec in INDEXES:
+        col = db[spec.collection]
+        existing = await col.index_information()
+        name = _find_index(existing, spec)
+        if name is None:
+            ok = await _build(col, spec)
+        else:
+            diffs = _differences(existing[name], spec)
+            ok = not diffs or await _reconcile(spec, name, diffs)
+        if not ok and spec.required:
+            problems.append(f"{spec.collection}.{spec.name}")
+
+    if problems and strict:
+        raise RuntimeError(f"Refusing to start, required indexes missing or different: {', '.join(problems)}")
+    if problems:
+        print(f"⚠️ Running without required indexes as registered: {', '.join(problems)}")
+
+
+# ---------- EXPLAIN ----------
+def main_queries() -> list:
+    """(label, collection, command) for the queries the app runs on hot paths."""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return [
+        ("dashboard_page", records_col.name, {
+            "aggregate": records_col.name,
+            "pipeline": [
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": 51},
+                *dashboard_projection(today),
+            ],
+            "cursor": {},
+        }),
+        ("expiring_soon", records_col.name, {
+            "find": records_col.name,
+            "filter": {"next_expiry": {"$lte": today + timedelta(days=7)}},
+            "sort": {"next_expiry": 1},
+        }),
+        ("export_since", records_col.name, {
+            "find": records_col.name,
+            "filter": {"updated_at": {"$gt": today - timedelta(days=1)}},
+            "sort": {"updated_at": 1, "_id": 1},
+        }),
+        ("lookup_plate", records_col.name, {"find": records_col.name, "filter": {"plate_number": "B 00 AAA"}}),
+        ("lookup_vin", records_col.name, {"find": records_col.name, "filter": {"vin_number": "00000000000000000"}}),
+        ("audit_log", audit_col.name, {"find": audit_col.name, "sort": {"timestamp": -1}, "limit": 100}),
+    ]
+
+
+def _plan_stages(node) -> list:
+    """Stage names of the winning plan(s) anywhere inside an explain document."""
+    stages = []
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        for key, value in node.items():
+            if key not in ("rejectedPlans", "allPlansExecution"):
+                stages += _plan_stages(value)
+    elif isinstance(node, list):
+        for value in node:
+            stages += _plan_stages(value)
+    return stages
+
+
+async def explain_main_queries() -> list:
+    report = []
+    for label, collection, command in main_queries():
+        try:
+            plan = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        except PyMongoError as e:
+            report.append({"query": label, "collection": collection, "error": str(e)})
+            continue
+        stages = _plan_stages(plan)
+        report.append({
+            "query": label,
+            "collection": collection,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
@@ -0,0 +1,103 @@
+# app/job_handlers.py
+"""
+Background job types (see app.jobs). Each handler gets a JobContext and
+returns a small result dict stored on the job; exports store their file in
+GridFS through ctx.store_result().
+"""
+from .database import records_col, files_col
+from .drafts import draft_from_document
+from .exports import CSV_PROJECTION, csv_chunks
+from .extraction_cache import cached_extract_stored
+from .extraction_pool import ExtractionTimeout
+from .jobs import job_handler
+from .records import delete_records
+from .selections import selections_col, iter_id_chunks, iter_selected_records
+from .storage import read_document, release_documents
+
+# records read / deleted per $in batch in bulk jobs
+JOB_BATCH_SIZE = 500
+
+
+# ---------- IMPORT ----------
+async def _release_import(bucket, job):
+    # the stored upload was never handed over to a draft
+    await release_documents(bucket, [job["params"]["document"]["file_id"]])
+
+
+@job_handler("import_pdf", on_failure=_release_import)
+async def import_pdf_job(ctx):
+    """params: {document} - an upload already stored by store_upload; it becomes an import draft."""
+    document = ctx.params["document"]
+    draft_id, data = await draft_from_document(ctx.bucket, document)
+    if draft_id is None:
+        await release_documents(ctx.bucket, [document["file_id"]])
+        return {"success": False, "error": "Could not extract data", "filename": document["filename"]}
+    return {"success": True, "parsed_data": data, "draft_id": draft_id, "filename": document["filename"]}
+
+
+# ---------- EXPORTS ----------
+@job_handler("export_selected_csv")
+async def export_selected_csv_job(ctx):
+    """params: {selection_id}; the CSV is the job's result file."""
+    selection = await selections_col.find_one({"_id": ctx.params["selection_id"]}, {"count": 1})
+    if selection is None:
+        raise ValueError("Selection expired")
+    total = selection["count"]
+    await ctx.progress(0, total)
+    records = iter_selected_records(selection["_id"], CSV_PROJECTION, JOB_BATCH_SIZE)
+    rows = 0
+
+    async def on_batch(done):
+        nonlocal rows
+        rows = done
+        await ctx.progress(done, total)
+
+    await ctx.store_result("selected_insurances.csv", "text/csv",
+                           csv_chunks(records, JOB_BATCH_SIZE, on_batch))
+    return {"rows": rows}
+
+
+# ---------- BULK OPERATIONS ----------
+@job_handler("delete_records")
+async def delete_records_job(ctx):
+    """
+    params: {selection_id}; records are deleted (leaving tombstones for since=
+    exports) and their documents released (deleted with the last reference).
+    """
+    selection = await selections_col.find_one({"_id": ctx.params["selection_id"]}, {"count": 1})
+    if selection is None:
+        raise ValueError("Selection expired")
+    total = selection["count"]
+    done = deleted = 0
+    async for chunk in iter_id_chunks(selection["_id"], JOB_BATCH_SIZE):
+        # a retried batch only finds records still present, so documents are released once
+        docs = await records_col.find({"_id": {"$in": chunk}}, {"documents.file_id": 1}).to_list(length=None)
+        deleted += await delete_records([d["_id"] for d in docs])
+        await release_documents(ctx.bucket, [doc["file_id"] for d in docs for doc in d.get("documents", [])])
+        done += len(chunk)
+        await ctx.progress(done, total)
+    return {"deleted": deleted}
+
+
+@job_handler("reextract")
+async def reextract_job(ctx):
+    """
+    Re-run extraction over every stored PDF, e.g. after EXTRACTOR_VERSION
+    changed, so later imports of the same documents are served from the cache.
+    """
+    query = {"metadata.sha256": {"$exists": True}, "metadata.type": "application/pdf"}
+    total = await files_col.count_documents(query)
+    await ctx.progress(0, total)
+    done = extracted = failed = 0
+    async for f in files_col.find(query, {"metadata.sha256": 1}, batch_size=JOB_BATCH_SIZE):
+        try:
+            # documents already extracted by this EXTRACTOR_VERSION are not read back
+            if await cached_extract_stored(f["metadata"]["sha256"], lambda: read_document(ctx.bucket, f["_id"])):
+                extracted += 1
+        except ExtractionTimeout:
+            failed += 1
+        done += 1
+        if done % 20 == 0:
+            await ctx.progress(done, total)
+    await ctx.progress(done, total)
+    return {"documents": done, "extracted": extracted, "failed": failed}
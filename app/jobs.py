@@ -0,0 +1,271 @@
+# app/jobs.py
+"""
+Mongo-backed queue for work too heavy for a request handler (imports,
+exports, bulk operations). Web routes submit jobs; `python -m app.worker`
+processes them.
+
+A job document moves through
+    queued -> running -> succeeded | failed
+A worker claims a queued job (or a running one whose lease has run out, i.e.
+its worker died) with one atomic find_one_and_update and holds a lease of
+JOB_LEASE_SECONDS, renewed on every progress report and by a heartbeat while
+the handler runs. Failed attempts are re-queued with exponential backoff until
+the handler's max_attempts is used up; an attempt whose worker crashed or hung
+(lease expired) counts too, so such a job fails instead of looping forever. Small results are kept on the job;
+files (exports) are written to GridFS and linked from it as result_file_id.
+
+Handlers are registered with @job_handler("type") in app.job_handlers and
+called as handler(ctx) with a JobContext.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from pymongo import ReturnDocument
+
+from .database import db
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "10"))  # seconds, doubled per attempt
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+jobs_col = db["jobs"]
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class LeaseLost(Exception):
+    """The job was taken over by another worker (our lease expired)."""
+
+
+class JobHandler:
+    def __init__(self, fn, max_attempts: int, on_failure=None):
+        self.fn = fn
+        self.max_attempts = max_attempts
+        self.on_failure = on_failure  # async fn(bucket, job) after the last attempt failed
+
+
+JOB_HANDLERS = {}
+
+
+def job_handler(job_type: str, max_attempts: int = JOB_MAX_ATTEMPTS, on_failure=None):
+    """Register fn(ctx: JobContext) -> result dict as the handler of `job_type`."""
+    def register(fn):
+        JOB_HANDLERS[job_type] = JobHandler(fn, max_attempts, on_failure)
+        return fn
+    return register
+
+
+# ---------- SUBMIT / STATUS ----------
+async def submit_job(job_type: str, params: dict) -> str:
+    now = datetime.utcnow()
+    result = await jobs_col.insert_one({
+        "type": job_type,
+        "params": params,
+        "status": QUEUED,
+        "attempts": 0,
+        "progress": {"done": 0, "total": None},
+        "run_after": now,
+        "created_at": now,
+        "updated_at": now,
+    })
+    return str(result.inserted_id)
+
+
+async def get_job(job_id: str):
+    try:
+        oid = ObjectId(job_id)
+    except InvalidId:
+        return None
+    return await jobs_col.find_one({"_id": oid})
+
+
+def job_status(job: dict) -> dict:
+    """Public (JSON) view of a job for the status endpoint."""
+    status = {
+        "id": str(job["_id"]),
+        "type": job["type"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "progress": job.get("progress"),
+        "error": job.get("error"),
+        "result": job.get("result"),
+        "created_at": job["created_at"].isoformat(),
+        "updated_at": job["updated_at"].isoformat(),
+    }
+    if job.get("result_file_id"):
+        status["result_url"] = f"/jobs/{job['_id']}/result"
+    return status
+
+
+# ---------- WORKER SIDE ----------
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+async def claim_job(worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS):
+    """Atomically take the oldest runnable job (queued and due, or with an expired lease)."""
+    now = datetime.utcnow()
+    return await jobs_col.find_one_and_update(
+        {"$or": [
+            {"status": QUEUED, "run_after": {"$lte": now}},
+            {"status": RUNNING, "lease_until": {"$lt": now}},
+        ]},
+        {
+            "$set": {"status": RUNNING, "worker": worker_id, "updated_at": now,
+                     "lease_until": now + timedelta(seconds=lease_seconds)},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+class JobContext:
+    """What a handler gets: its params, progress reporting and result storage."""
+
+    def __init__(self, job: dict, worker_id: str, bucket, lease_seconds: int = JOB_LEASE_SECONDS):
+        self.job = job
+        self.id = job["_id"]
+        self.params = job["params"]
+        self.worker_id = worker_id
+        self.bucket = bucket
+        self.lease_seconds = lease_seconds
+        self.result_file_id = None
+        self.heartbeat_error = None
+
+    async def _update(self, fields: dict):
+        """Update our job while we still hold it; renews the lease."""
+        now = datetime.utcnow()
+        fields = {**fields, "updated_at": now, "lease_until": now + timedelta(seconds=self.lease_seconds)}
+        result = await jobs_col.update_one({"_id": self.id, "worker": self.worker_id, "status": RUNNING},
+                                           {"$set": fields})
+        if not result.matched_count:
+            raise LeaseLost(str(self.id))
+
+    async def heartbeat(self):
+        await self._update({})
+
+    async def progress(self, done: int, total: int = None):
+        await self._update({"progress": {"done": done, "total": total}})
+
+    async def store_result(self, filename: str, content_type: str, chunks):
+        """Write an (async) iterable of str/bytes chunks to GridFS as the job's result file."""
+        grid_in = self.bucket.open_upload_stream(
+            filename, metadata={"type": content_type, "job_id": self.id})
+        try:
+            async for chunk in chunks:
+                await grid_in.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+        try:
+            await self._update({"result_file_id": grid_in._id, "result_filename": filename})
+        except LeaseLost:
+            # the job is no longer ours: nothing will ever link this file
+            await self.bucket.delete(grid_in._id)
+            raise
+        self.result_file_id = grid_in._id
+        # left behind by an earlier attempt that failed after storing its result
+        previous = self.job.get("result_file_id")
+        if previous:
+            try:
+                await self.bucket.delete(previous)
+            except NoFile:
+                pass
+
+
+async def _keep_lease(ctx: JobContext, work: asyncio.Task):
+    try:
+        while True:
+            await asyncio.sleep(ctx.lease_seconds / 3)
+            await ctx.heartbeat()
+    except LeaseLost:
+        pass  # the handler notices on its next progress report
+    except Exception as e:
+        # without a heartbeat the lease would run out under a live handler
+        print(f"❌ Heartbeat for job {ctx.id} failed: {e}; stopping the handler")
+        ctx.heartbeat_error = e
+        work.cancel()
+
+
+async def run_job(job: dict, worker_id: str, bucket, lease_seconds: int = JOB_LEASE_SECONDS):
+    """Run one claimed job to completion, retry scheduling or failure."""
+    handler = JOB_HANDLERS.get(job["type"])
+    mine = {"_id": job["_id"], "worker": worker_id, "status": RUNNING}
+    if handler is None:
+        await _failed(job, handler, mine, bucket, ValueError(f"Unknown job type {job['type']!r}"))
+        return
+    if job["attempts"] > handler.max_attempts:
+        # reclaimed after its lease expired on the last allowed attempt (worker crashed, killed or hung)
+        await _give_up(job, handler, mine, bucket,
+                       f"Gave up after {handler.max_attempts} attempts; the last worker stopped without reporting")
+        return
+
+    ctx = JobContext(job, worker_id, bucket, lease_seconds)
+    work = asyncio.create_task(handler.fn(ctx))
+    heartbeat = asyncio.create_task(_keep_lease(ctx, work))
+    try:
+        result = await work
+    except LeaseLost:
+        print(f"⚠️ Lost the lease on job {job['_id']}; another worker took it over")
+        return
+    except asyncio.CancelledError:
+        if ctx.heartbeat_error is None:
+            raise  # the worker itself is being cancelled
+        await _failed(job, handler, mine, bucket, ctx.heartbeat_error)
+        return
+    except Exception as e:
+        await _failed(job, handler, mine, bucket, e)
+        return
+    finally:
+        heartbeat.cancel()
+
+    await jobs_col.update_one(mine, {"$set": {
+        "status": SUCCEEDED, "result": result, "error": None, "updated_at": datetime.utcnow(),
+    }})
+
+
+async def _failed(job: dict, handler, mine: dict, bucket, error: Exception):
+    now = datetime.utcnow()
+    max_attempts = handler.max_attempts if handler else 1
+    print(f"❌ Job {job['_id']} ({job['type']}) attempt {job['attempts']}/{max_attempts} failed: {error}")
+    if job["attempts"] < max_attempts:
+        delay = JOB_RETRY_DELAY * 2 ** (job["attempts"] - 1)
+        await jobs_col.update_one(mine, {"$set": {
+            "status": QUEUED, "error": str(error), "updated_at": now,
+            "run_after": now + timedelta(seconds=delay),
+        }})
+        return
+    await _give_up(job, handler, mine, bucket, str(error))
+
+
+async def _give_up(job: dict, handler, mine: dict, bucket, error: str):
+    result = await jobs_col.update_one(mine, {"$set": {
+        "status": FAILED, "error": error, "updated_at": datetime.utcnow(),
+    }})
+    if result.matched_count and handler and handler.on_failure:
+        await handler.on_failure(bucket, job)
+
+
+async def purge_jobs(bucket, retention_days: int = JOB_RETENTION_DAYS) -> int:
+    """Delete finished jobs older than retention_days together with their result files."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    purged = 0
+    async for job in jobs_col.find({"status": {"$in": [SUCCEEDED, FAILED]}, "updated_at": {"$lt": cutoff}},
+                                   {"result_file_id": 1}):
+        if job.get("result_file_id"):
+            try:
+                await bucket.delete(job["result_file_id"])
+            except NoFile:
+                pass
+        await jobs_col.delete_one({"_id": job["_id"]})
+        purged += 1
+    return purged
@@ -0,0 +1,95 @@
+# app/label_scanner.py
+"""
+Aho–Corasick scanner that finds every extraction label on a page in one pass.
+
+The automaton runs over word tokens rather than characters: each PDF word is
+lower-cased, diacritic-folded (ș→s, ă→a, ...) and split on punctuation, so
+'Nr. înmatriculare:' and 'nr inmatriculare' both become ('nr', 'inmatriculare')
+and a label only ever matches whole words ('asigurat' hits 'Asigurat/Proprietar'
+but not 'Asigurator'). Labels never span two text lines.
+"""
+import re
+from collections import deque
+
+# Romanian diacritics (comma and legacy cedilla forms) to plain ASCII, 1:1
+FOLD = list(zip("ăâîșşțţ", "aaissst"))
+SPLIT_RE = re.compile(r"[\W_]+")
+
+
+def fold(text: str) -> str:
+    # a few str.replace calls beat str.translate, which is slow on non-ASCII text
+    for accented, plain in FOLD:
+        if accented in text:
+            text = text.replace(accented, plain)
+    return text
+
+
+def tokens(text: str) -> list:
+    return [t for t in SPLIT_RE.split(fold(text.lower())) if t]
+
+
+class LabelScanner:
+    def __init__(self, groups: dict):
+        """groups: {group: [label, ...]} with labels in priority order (first = preferred)."""
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # per state: [((group, priority), length)]
+        for group, labels in groups.items():
+            for priority, label in enumerate(labels):
+                self._add(tokens(label), (group, priority))
+        self._link()
+        # tokens any label uses; other plain words can only reset matching
+        self.vocab = {tok for state in self.goto for tok in state}
+
+    def _add(self, pattern: list, payload):
+        state = 0
+        for tok in pattern:
+            if tok not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.goto[state][tok] = len(self.goto) - 1
+            state = self.goto[state][tok]
+        self.out[state].append((payload, len(pattern)))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and tok not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(tok, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def scan(self, words: list) -> dict:
+        """
+        All label occurrences among a page's words (PyMuPDF 'words' tuples).
+        Returns {group: [(priority, first_word, last_word), ...]} in reading order.
+        """
+        hits = {}
+        state = 0
+        stream = []  # word index of every token fed so far
+        line = None
+        prev = -1
+        goto, fail, out, vocab = self.goto, self.fail, self.out, self.vocab
+        # fold the whole page in one pass ("\0" never occurs in PDF words) and skip
+        # plain words no label contains: they would only send the automaton to state 0
+        folded = fold("\0".join(w[4] for w in words).lower()).split("\0")
+        candidates = [wi for wi, text in enumerate(folded) if text in vocab or not text.isalnum()]
+        for wi in candidates:
+            w, text = words[wi], folded[wi]
+            if w[5:7] != line or wi != prev + 1:
+                line = w[5:7]
+                state = 0  # a new text line (or a skipped word) restarts matching
+            prev = wi
+            for tok in ((text,) if text.isalnum() else [t for t in SPLIT_RE.split(text) if t]):
+                stream.append(wi)
+                while state and tok not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(tok, 0)
+                for (group, priority), length in out[state]:
+                    hits.setdefault(group, []).append((priority, stream[-length], wi))
+        return hits
@@ -0,0 +1,239 @@
+# app/layouts.py
+"""
+Insurer layout fingerprinting and the per-layout template registry.
+
+A layout fingerprint hashes the page-1 header words plus the coarse geometry
+of the header blocks, so every policy printed from the same insurer template
+gets the same fingerprint regardless of the customer data on it. A template
+maps a fingerprint to where each field sits on a known layout, either
+  {"page": 0, "rect": [x0, y0, x1, y1]}   the words inside that rectangle
+  {"page": 0, "label": "Nr. înmatriculare", "max_chars": 60}
+Templates are JSON files in LAYOUT_TEMPLATES_DIR, loaded once per process.
+
+    python -m app.layouts fingerprint policy.pdf
+    python -m app.layouts register policy.pdf --name allianz-rca-2024 --insurer "Allianz-Țiriac"
+    python -m app.layouts list
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import fitz
+
+LAYOUT_TEMPLATES_DIR = Path(os.getenv("LAYOUT_TEMPLATES_DIR", Path(__file__).parent / "layout_templates"))
+
+# top share of page 1 treated as the insurer header
+HEADER_FRACTION = 0.2
+# block origins are snapped to this grid (points) so small shifts don't matter
+GEOMETRY_GRID = 24
+HEADER_WORD_RE = re.compile(r"^[^\W\d_]{3,}$")
+WS_RE = re.compile(r"\s+")
+# a word may overhang a template rectangle by this much (points) and still count as inside
+CLIP_TOLERANCE = 1.0
+# rectangles of these fields keep the sample value's width; the rest run to the end of their column
+FIXED_WIDTH_FIELDS = ("vin_number", "insurance_start", "insurance_end")
+PAGE_MARGIN = 18.0
+
+
+# ---------- fingerprint ----------
+def fingerprint(page, textpage=None) -> str:
+    """
+    Stable id of the layout a page was printed from (header words + header block grid).
+    Pass the page's TextPage when the caller reads the page too, so it is parsed once.
+    """
+    limit = page.rect.height * HEADER_FRACTION
+    words = sorted({
+        w[4].lower() for w in page.get_text("words", textpage=textpage)
+        if w[3] <= limit and HEADER_WORD_RE.match(w[4])
+    })
+    geometry = sorted({
+        (round(b[0] / GEOMETRY_GRID), round(b[1] / GEOMETRY_GRID))
+        for b in page.get_text("blocks", textpage=textpage) if b[3] <= limit and b[4].strip()
+    })
+    payload = json.dumps([words, geometry], ensure_ascii=False)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+# ---------- templates ----------
+class LayoutTemplate:
+    def __init__(self, name: str, fingerprint: str, fields: dict, insurer: str = ""):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.fields = fields
+        self.insurer = insurer
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LayoutTemplate":
+        return cls(data["name"], data["fingerprint"], data["fields"], data.get("insurer", ""))
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "insurer": self.insurer, "fingerprint": self.fingerprint, "fields": self.fields}
+
+    def raw_values(self, pdf, words: dict = None) -> dict:
+        """
+        Raw text for each templated field; parsing / validation is up to the extractor.
+        A rect field is left out when a word crosses the rectangle's left or right
+        edge: the value is longer than the template allows, and reading it clipped
+        would yield a truncated value that still looks valid.
+        `words` ({page number: get_text("words")}) may hold pages the caller already read.
+        """
+        values = {}
+        words = dict(words or {})  # page number -> get_text("words"), read once per page
+        for field, spec in self.fields.items():
+            page_no = spec.get("page", 0)
+            if page_no >= len(pdf):
+                continue
+            page = pdf[page_no]
+            if "rect" in spec:
+                if page_no not in words:
+                    words[page_no] = page.get_text("words")
+                inside = _words_in(words[page_no], spec["rect"])
+                if inside is not None:
+                    values[field] = " ".join(w[4] for w in inside)
+            elif "label" in spec:
+                text = WS_RE.sub(" ", page.get_text("text")).strip()
+                i = text.lower().find(spec["label"].lower())
+                if i != -1:
+                    values[field] = text[i + len(spec["label"]): i + len(spec["label"]) + spec.get("max_chars", 80)]
+        return values
+
+
+def _words_in(words: list, rect) -> list:
+    """Words whose centre line lies in rect, in reading order; None if one is cut by a side edge."""
+    x0, y0, x1, y1 = rect
+    inside = []
+    for w in words:
+        if not y0 <= (w[1] + w[3]) / 2 <= y1 or w[2] <= x0 or w[0] >= x1:
+            continue
+        if w[0] < x0 - CLIP_TOLERANCE or w[2] > x1 + CLIP_TOLERANCE:
+            return None
+        inside.append(w)
+    return sorted(inside, key=lambda w: (w[5], w[6], w[7]))
+
+
+class LayoutRegistry:
+    def __init__(self, directory: Path = LAYOUT_TEMPLATES_DIR):
+        self.directory = Path(directory)
+        self.templates = {}
+        self.load()
+
+    def load(self):
+        self.templates = {}
+        if not self.directory.is_dir():
+            return
+        for path in sorted(self.directory.glob("*.json")):
+            template = LayoutTemplate.from_dict(json.loads(path.read_text(encoding="utf-8")))
+            self.templates[template.fingerprint] = template
+
+    @property
+    def digest(self) -> str:
+        """Changes whenever any template does (part of the extraction cache key)."""
+        payload = json.dumps([self.templates[fp].to_dict() for fp in sorted(self.templates)],
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:8]
+
+    def match(self, page, textpage=None):
+        if not self.templates:
+            return None
+        return self.templates.get(fingerprint(page, textpage))
+
+    def save(self, template: LayoutTemplate) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{template.name}.json"
+        path.write_text(json.dumps(template.to_dict(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        self.templates[template.fingerprint] = template
+        return path
+
+
+layout_registry = LayoutRegistry()
+
+
+# ---------- registering from a sample ----------
+def _search_variants(field: str, value: str) -> list:
+    """Spellings a normalized value may have on the page."""
+    if field in ("insurance_start", "insurance_end") and re.match(r"^\d{4}-\d{2}-\d{2}$", value):
+        y, m, d = value.split("-")
+        return [f"{d}.{m}.{y}", f"{d}-{m}-{y}", f"{d}/{m}/{y}"]
+    if field == "plate_number":
+        return [value, value.replace(" ", "")]
+    return [value]
+
+
+def _column_end(page, r) -> float:
+    """Right edge for a free-text value found at r: just before the next word on its line, else the margin."""
+    cy = (r.y0 + r.y1) / 2
+    starts = [w[0] for w in page.get_text("words") if w[0] >= r.x1 and w[1] <= cy <= w[3]]
+    return min(starts) - 2 if starts else page.rect.width - PAGE_MARGIN
+
+
+def template_from_sample(pdf_bytes: bytes, name: str, insurer: str = "", expected: dict = None) -> LayoutTemplate:
+    """
+    Build a rect-based template from one sample policy: the generic extractor
+    (or `expected` values) says what each field is, and the rectangle where that
+    text sits on the page becomes the field's coordinates. Free-text fields get
+    the rest of their column, so longer values on other policies still fit.
+    """
+    from .extractor import extractor
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+        values = extractor.extract_pages(pdf, use_templates=False)
+        values.update(expected or {})
+        fields = {}
+        for field, value in values.items():
+            if not value:
+                continue
+            for page_no, page in enumerate(pdf):
+                hits = [r for v in _search_variants(field, value) for r in page.search_for(v)]
+                if hits:
+                    r = hits[0]
+                    if field in FIXED_WIDTH_FIELDS:
+                        right = min(page.rect.width, r.x1 + (r.x1 - r.x0) * 0.5)
+                    else:
+                        # names / plates on other policies may be much longer than the sample's
+                        right = _column_end(page, r)
+                    fields[field] = {"page": page_no, "rect": [round(r.x0 - 2, 1), round(r.y0 - 2, 1),
+                                                               round(right, 1), round(r.y1 + 2, 1)]}
+                    break
+        return LayoutTemplate(name, fingerprint(pdf[0]), fields, insurer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.layouts", description="Manage insurer layout templates")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fp = sub.add_parser("fingerprint", help="print the layout fingerprint of a PDF")
+    fp.add_argument("pdf")
+    reg = sub.add_parser("register", help="register a template from a sample PDF")
+    reg.add_argument("pdf")
+    reg.add_argument("--name", required=True)
+    reg.add_argument("--insurer", default="")
+    reg.add_argument("--field", action="append", default=[], metavar="FIELD=VALUE",
+                     help="correct value of a field when the generic extractor gets it wrong")
+    sub.add_parser("list", help="list registered templates")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for t in layout_registry.templates.values():
+            print(f"{t.fingerprint}  {t.name}  {t.insurer}  fields={','.join(t.fields)}")
+        return
+
+    pdf_bytes = Path(args.pdf).read_bytes()
+    if args.command == "fingerprint":
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+            print(fingerprint(pdf[0]))
+        return
+
+    expected = dict(f.split("=", 1) for f in args.field)
+    template = template_from_sample(pdf_bytes, args.name, args.insurer, expected)
+    if not template.fields:
+        sys.exit("❌ No field could be located on the sample")
+    path = layout_registry.save(template)
+    print(f"✅ Registered {template.name} ({template.fingerprint}) with fields "
+          f"{', '.join(template.fields)} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
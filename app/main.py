@@ -1,15 +1,38 @@
-from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException, Query, Body
+from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
-from gridfs import GridFSBucket
-from io import BytesIO, StringIO
-import csv, traceback, re, fitz
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+import traceback, re, fitz
 
 from .database import db, records_col
+from .dashboard import fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .records import current_insurance_fields, deleted_records_col
+from .indexes import ensure_indexes, explain_main_queries
+from .storage import (
+    store_upload, open_document, document_entry, document_content_type, content_disposition, iter_chunks,
+    document_etag, document_last_modified, etag_matches, parse_range,
+    RangeNotSatisfiable, IMMUTABLE_CACHE_CONTROL,
+    store_uploads, release_documents, UploadTooLarge, MAX_UPLOAD_MB,
+)
+from .extraction_pool import extraction_pool, ExtractionTimeout
+from .extraction_cache import cached_extract
+from .batch_import import batch_response, multipart_boundary
+from .drafts import create_draft, claim_draft, expire_drafts
+from .exports import (
+    CSV_PROJECTION, FULL_CSV_HEADER, FULL_CSV_PROJECTION, EXPORT_BATCH_SIZE,
+    csv_chunks, full_csv_row, gzip_chunks,
+)
+from .columnar_export import TABLES as COLUMNAR_TABLES, FORMATS as COLUMNAR_FORMATS, columnar_chunks
+from .xlsx_export import XLSX_MEDIA_TYPE, XLSX_PROJECTION, xlsx_chunks
+from .jobs import submit_job, get_job, job_status
+from .selections import (
+    SELECTION_FILTERS, UnknownFilter, create_selection_from_ids, create_selection_from_filter,
+    get_selection, selection_status, iter_selected_records,
+)
 from .email_alert import send_email_alert
 from .validators import validate_phone, validate_plate, validate_vin
 
@@ -20,18 +43,33 @@ templates = Jinja2Templates(directory="app/templates")
 # ========== STARTUP ==========
 @app.on_event("startup")
 async def startup_event():
-    app.state.fs_bucket = GridFSBucket(db.delegate)
+    app.state.fs_bucket = AsyncIOMotorGridFSBucket(db)
+    await ensure_indexes()
 
     scheduler = AsyncIOScheduler()
     scheduler.add_job(check_expiring_insurances, "cron", hour=7, timezone="Europe/Bucharest")
+    scheduler.add_job(expire_drafts, "interval", hours=1, args=[app.state.fs_bucket])
     scheduler.start()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    extraction_pool.shutdown()
+
+
 # ========== CRON JOB ==========
 async def check_expiring_insurances():
-    upcoming = datetime.utcnow() + timedelta(days=7)
-    cursor = records_col.find({"insurances.insurance_end": {"$lte": upcoming}})
-    items = await cursor.to_list(length=None)
+    """
+    Daily alert: policies expiring within 7 days, plus every policy already
+    expired (repeated each day until it is renewed).
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    upcoming = today + timedelta(days=7)
+    cursor = records_col.find(
+        {"next_expiry": {"$lte": upcoming}},
+        {"name": 1, "car_name": 1, "plate_number": 1, "next_expiry": 1},
+    ).sort("next_expiry", 1)
+    items = [{**d, "insurance_end": d["next_expiry"]} async for d in cursor]
     if items:
         send_email_alert(items)
 
@@ -39,30 +77,22 @@ async def check_expiring_insurances():
 # ========== ROUTES ==========
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    cursor = records_col.find().sort("created_at", -1)
-    data = await cursor.to_list(length=None)
-    items = []
-
-    for d in data:
-        latest_ins = d.get("insurances", [{}])[-1] if d.get("insurances") else {}
-        end = latest_ins.get("insurance_end")
-        days_left = (end.date() - datetime.utcnow().date()).days if end else None
-
-        items.append({
-            "id": str(d["_id"]),
-            "name": d.get("name"),
-            "phone": d.get("phone"),
-            "car_name": d.get("car_name"),
-            "plate_number": d.get("plate_number"),
-            "vin_number": d.get("vin_number"),
-            "insurance_start": latest_ins.get("insurance_start").date() if latest_ins.get("insurance_start") else "",
-            "insurance_end": end.date() if end else "",
-            "days_left": days_left,
-            "documents": d.get("documents", []),
-        })
-
-    return templates.TemplateResponse("index.html", {"request": request, "items": items, "today": datetime.utcnow().date()})
+async def home(
+    request: Request,
+    after: str | None = None,
+    before: str | None = None,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    items, next_cursor, prev_cursor = await fetch_page(records_col, page_size, after=after, before=before)
+
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        "items": items,
+        "today": datetime.utcnow().date(),
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    })
 
 
 # ---------- ADD NEW RECORD ----------
@@ -76,6 +106,7 @@ async def add_record(
     insurance_start: str = Form(...),
     insurance_end: str = Form(...),
     files: list[UploadFile] = File(None),
+    draft_id: str | None = Form(None),
 ):
     validate_phone(phone)
     validate_plate(plate_number)
@@ -85,18 +116,21 @@ async def add_record(
     end_dt = datetime.strptime(insurance_end, "%Y-%m-%d")
 
     bucket = app.state.fs_bucket
-    uploaded_docs = []
-
-    if files:
-        for f in files:
-            content = await f.read()
-            file_id = await bucket.upload_from_stream(f.filename, content, metadata={"type": f.content_type})
-            uploaded_docs.append({
-                "file_id": file_id,
-                "filename": f.filename,
-                "content_type": f.content_type,
-                "uploaded_at": datetime.utcnow()
-            })
+
+    # browsers send an empty part when no file was picked
+    files = [f for f in files or [] if f.filename]
+    try:
+        uploaded_docs = await store_uploads(bucket, files)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"{e} exceeds the {MAX_UPLOAD_MB} MB upload limit")
+
+    # PDF already stored by /import_pdf?draft=true: take over the draft's reference
+    if draft_id:
+        draft_docs = await claim_draft(draft_id)
+        if draft_docs is None:
+            await release_documents(bucket, [d["file_id"] for d in uploaded_docs])
+            raise HTTPException(status_code=410, detail="Import draft expired or already saved; import the PDF again")
+        uploaded_docs = draft_docs + uploaded_docs
 
     record = {
         "name": name.strip(),
@@ -112,226 +146,336 @@ async def add_record(
         }],
         "created_at": datetime.utcnow()
     }
+    record["updated_at"] = record["created_at"]
+    record.update(current_insurance_fields(record["insurances"]))
 
-    await records_col.insert_one(record)
+    try:
+        await records_col.insert_one(record)
+    except Exception:
+        await release_documents(bucket, [d["file_id"] for d in uploaded_docs])
+        raise
     return RedirectResponse("/", status_code=303)
 
 
 # ---------- DOWNLOAD FILE ----------
 @app.get("/download_file/{file_id}")
-async def download_file(file_id: str):
-    bucket = app.state.fs_bucket
-    buffer = BytesIO()
-    try:
-        await bucket.download_to_stream(ObjectId(file_id), buffer)
-        buffer.seek(0)
-        return StreamingResponse(buffer, media_type="application/octet-stream",
-                                 headers={"Content-Disposition": f"attachment; filename=file_{file_id}.pdf"})
-    except Exception as e:
-        print("File download error:", e)
+async def download_file(file_id: str, request: Request, record_id: str | None = None):
+    """Serve a stored document under the filename / content type of the record it belongs to."""
+    grid_out = await open_document(app.state.fs_bucket, file_id)
+    if grid_out is None:
         raise HTTPException(status_code=404, detail="File not found")
 
+    etag = document_etag(grid_out)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": document_last_modified(grid_out),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        grid_out.close()
+        return Response(status_code=304, headers=headers)
+
+    length = grid_out.length
+    # shared content keeps the first uploader's name in GridFS, so prefer the record's entry
+    entry = await document_entry(file_id, record_id) or {}
+    filename = entry.get("filename") or grid_out.filename or f"file_{file_id}.pdf"
+    headers["Content-Disposition"] = content_disposition(filename)
+    media_type = entry.get("content_type") or document_content_type(grid_out)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    # If-Range: only honour the range if the client's copy is still current
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, length)
+        except RangeNotSatisfiable:
+            grid_out.close()
+            headers["Content-Range"] = f"bytes */{length}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(length)
+        return StreamingResponse(iter_chunks(grid_out), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_chunks(grid_out, start, end - start + 1), status_code=206,
+                             media_type=media_type, headers=headers)
+
+
+# ---------- EXPORT ALL TO CSV ----------
+def _naive_utc(since: datetime) -> datetime:
+    return since.astimezone(timezone.utc).replace(tzinfo=None) if since.tzinfo is not None else since
+
+
+def _records_since(since: datetime | None, projection: dict):
+    """Cursor over every record (or those changed after `since`) in (updated_at, _id) index order."""
+    query = {}
+    if since is not None:
+        query["updated_at"] = {"$gt": _naive_utc(since)}
+    return records_col.find(query, projection, batch_size=EXPORT_BATCH_SIZE).sort([("updated_at", 1), ("_id", 1)])
+
+
+async def _records_and_deletions_since(since: datetime):
+    """Records changed after `since`, then tombstones of those deleted after it."""
+    async for d in _records_since(since, FULL_CSV_PROJECTION):
+        yield d
+    tombstones = deleted_records_col.find({"deleted_at": {"$gt": _naive_utc(since)}}, batch_size=EXPORT_BATCH_SIZE)
+    async for d in tombstones.sort([("deleted_at", 1), ("_id", 1)]):
+        yield d
+
+
+@app.get("/export_csv")
+async def export_csv(since: datetime | None = None, gzip: bool = False):
+    """
+    Every record as CSV, streamed batch by batch in (updated_at, _id) order.
+    since=<ISO timestamp> limits it to records changed after that moment
+    (nightly incremental pulls), followed by a tombstone row (Deleted = true)
+    for each record deleted after it; tombstones are kept TOMBSTONE_TTL_DAYS,
+    so pulls further apart than that must start over with a full export.
+    gzip=true compresses on the fly.
+    """
+    if since is None:
+        cursor = _records_since(None, FULL_CSV_PROJECTION)
+    else:
+        cursor = _records_and_deletions_since(since)
+    chunks = csv_chunks(cursor, EXPORT_BATCH_SIZE, header=FULL_CSV_HEADER, row=full_csv_row)
+
+    filename = "insurances.csv"
+    media_type = "text/csv"
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+# ---------- SELECTIONS ----------
+@app.post("/selections")
+async def create_selection(
+    ids: list[str] | None = Body(None),
+    filter: str | None = Body(None),
+    days: int = Body(30, ge=0),
+):
+    """
+    Store a selection server-side, from a JSON id list ({"ids": [...]}) or a
+    filter ({"filter": "expiring", "days": 30}); exports and bulk jobs then
+    take its selection_id.
+    """
+    if filter:
+        try:
+            selection = await create_selection_from_filter(filter, days)
+        except UnknownFilter:
+            raise HTTPException(status_code=400, detail=f"Unknown filter; use one of {', '.join(SELECTION_FILTERS)}")
+    elif ids:
+        selection = await create_selection_from_ids(ids)
+    else:
+        raise HTTPException(status_code=400, detail="Give either ids or filter")
+    return JSONResponse(selection_status(selection), status_code=201)
+
+
+@app.get("/selections/{selection_id}")
+async def get_selection_status(selection_id: str):
+    selection = await get_selection(selection_id)
+    if selection is None:
+        raise HTTPException(status_code=404, detail="Selection not found or expired")
+    return JSONResponse(selection_status(selection))
+
+
+async def _selection(selection_id: str | None, selected_ids: str | None) -> dict:
+    """The selection a form refers to; a legacy comma-joined id list becomes a selection first."""
+    if selection_id:
+        selection = await get_selection(selection_id)
+        if selection is None:
+            raise HTTPException(status_code=410, detail="Selection expired; select the records again")
+    else:
+        ids = [i.strip() for i in (selected_ids or "").split(",") if i.strip()]
+        if not ids or not all(ObjectId.is_valid(i) for i in ids):
+            raise HTTPException(status_code=400, detail="No valid records selected")
+        selection = await create_selection_from_ids(ids)
+    if not selection["count"]:
+        raise HTTPException(status_code=400, detail="No records selected")
+    return selection
+
 
 # ---------- EXPORT SELECTED TO CSV ----------
 @app.post("/export_selected_csv")
-async def export_selected_csv(selected_ids: str = Form(...)):
-    try:
-        ids = [ObjectId(i) for i in selected_ids.split(",") if i.strip()]
-        if not ids:
-            raise HTTPException(status_code=400, detail="No records selected")
-
-        cursor = records_col.find({"_id": {"$in": ids}})
-        data = await cursor.to_list(length=None)
-
-        out = StringIO()
-        writer = csv.writer(out)
-        writer.writerow(["Name", "Phone", "Car", "Plate", "VIN", "Start", "End"])
-        for d in data:
-            ins = d.get("insurances", [{}])[-1]
-            writer.writerow([
-                d.get("name", ""),
-                d.get("phone", ""),
-                d.get("car_name", ""),
-                d.get("plate_number", ""),
-                d.get("vin_number", ""),
-                ins.get("insurance_start").strftime("%Y-%m-%d") if ins.get("insurance_start") else "",
-                ins.get("insurance_end").strftime("%Y-%m-%d") if ins.get("insurance_end") else "",
-            ])
-
-        out.seek(0)
-        headers = {"Content-Disposition": 'attachment; filename="selected_insurances.csv"'}
-        return StreamingResponse(iter([out.getvalue()]), media_type="text/csv", headers=headers)
-
-    except Exception as e:
-        print("CSV export error:", e)
-        raise HTTPException(status_code=500, detail=f"Error exporting CSV: {e}")
+async def export_selected_csv(selection_id: str | None = Form(None), selected_ids: str | None = Form(None)):
+    selection = await _selection(selection_id, selected_ids)
+    # records are read in chunked $in batches: memory stays flat whatever the selection size
+    records = iter_selected_records(selection["_id"], CSV_PROJECTION)
+    headers = {"Content-Disposition": 'attachment; filename="selected_insurances.csv"'}
+    return StreamingResponse(csv_chunks(records, EXPORT_BATCH_SIZE), media_type="text/csv", headers=headers)
+
+
+# ---------- EXCEL EXPORT ----------
+def _xlsx_response(records, days_left: bool, filename: str) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(xlsx_chunks(records, days_left), media_type=XLSX_MEDIA_TYPE, headers=headers)
+
+
+@app.post("/export_selected_xlsx")
+async def export_selected_xlsx(
+    selection_id: str | None = Form(None),
+    selected_ids: str | None = Form(None),
+    days_left: bool = Form(False),
+):
+    selection = await _selection(selection_id, selected_ids)
+    records = iter_selected_records(selection["_id"], XLSX_PROJECTION)
+    return _xlsx_response(records, days_left, "selected_insurances.xlsx")
+
+
+@app.get("/export_xlsx")
+async def export_xlsx(since: datetime | None = None, days_left: bool = False):
+    return _xlsx_response(_records_since(since, XLSX_PROJECTION), days_left, "insurances.xlsx")
+
+
+# ---------- COLUMNAR EXPORT (Parquet / Arrow) ----------
+@app.get("/export/{table}.{fmt}")
+async def export_columnar(table: str, fmt: str, since: datetime | None = None, selection_id: str | None = None):
+    """
+    /export/policies.parquet, /export/insurances.arrow, ...: the current-policy
+    view or the flattened insurance history as Parquet or Arrow IPC stream,
+    for every record, those changed after `since`, or a stored selection.
+    """
+    if table not in COLUMNAR_TABLES or fmt not in COLUMNAR_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown export; use /export/{policies|insurances}.{parquet|arrow}")
+    projection = COLUMNAR_TABLES[table][1]
+    if selection_id:
+        selection = await _selection(selection_id, None)
+        records = iter_selected_records(selection["_id"], projection)
+    else:
+        records = _records_since(since, projection)
+
+    media_type, extension = COLUMNAR_FORMATS[fmt]
+    headers = {"Content-Disposition": f'attachment; filename="{table}.{extension}"'}
+    return StreamingResponse(columnar_chunks(records, table, fmt), media_type=media_type, headers=headers)
+
+
+# ---------- ADMIN: QUERY PLANS ----------
+@app.get("/admin/explain")
+async def admin_explain():
+    report = await explain_main_queries()
+    return JSONResponse({
+        "queries": report,
+        "collscans": [q["query"] for q in report if q.get("collscan")],
+    })
+
+
+@app.get("/admin/extraction_pool")
+async def admin_extraction_pool():
+    return JSONResponse(extraction_pool.stats())
 
 
 # ---------- IMPORT PDF (auto-extract data) ----------
 @app.post("/import_pdf")
-async def import_pdf(file: UploadFile = File(...)):
+async def import_pdf(file: UploadFile = File(...), draft: bool = False):
+    """
+    Extract fields from a policy PDF. With ?draft=true the PDF is also stored
+    (once) and a draft_id is returned; posting it with the confirm form to /add
+    attaches the stored PDF without uploading it again.
+    """
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files allowed")
 
-    content = await file.read()
-    data = extract_insurance_data(content)
+    draft_id = None
+    try:
+        if draft:
+            draft_id, data = await create_draft(app.state.fs_bucket, file)
+        else:
+            data = await cached_extract(await file.read())
+    except ExtractionTimeout:
+        raise HTTPException(status_code=504, detail="PDF extraction timed out")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"{e} exceeds the {MAX_UPLOAD_MB} MB upload limit")
     if not data:
         raise HTTPException(status_code=400, detail="Could not extract data")
 
-    return JSONResponse({
+    response = {
         "success": True,
         "parsed_data": data,
         "filename": file.filename
-    })
+    }
+    if draft_id:
+        response["draft_id"] = draft_id
+    return JSONResponse(response)
 
 
-def extract_insurance_data(pdf_bytes: bytes):
+# ---------- IMPORT MANY PDFs (NDJSON progress stream) ----------
+@app.post("/import_pdf_batch")
+async def import_pdf_batch(request: Request):
     """
-    Robust extractor for: name, VIN, plate, start_date, end_date
-    Works across multiple Romanian policy layouts (multi-column, different labels).
+    Accepts many PDFs and/or ZIP archives of PDFs (multipart/form-data, any
+    field name). Streams one JSON line per PDF as soon as it is parsed:
+    {index, filename, success, parsed_data | error}.
+
+    The body is parsed as it arrives rather than through request.form(), so
+    there is no 1000-file limit and extraction starts with the first file.
     """
-    import fitz, re
-    from datetime import datetime
-
-    # --- helpers -------------------------------------------------------------
-    def norm_ws(s: str) -> str:
-        return re.sub(r"\s+", " ", s).strip()
-
-    def to_iso(d: str) -> str:
-        for fmt in ("%d.%m.%Y", "%d-%m-%Y", "%d/%m/%Y"):
-            try:
-                return datetime.strptime(d, fmt).strftime("%Y-%m-%d")
-            except:  # noqa: E722
-                pass
-        return ""
-
-    def normalize_plate(p: str) -> str:
-        p = re.sub(r"[^A-Z0-9]", "", p.upper())
-        # Romanian formats: B 99 ABC or AA 99 ABC
-        # Try to re-space nicely
-        if len(p) in (7, 8):  # common lengths after removing spaces
-            # Heuristic: if starts with B (one-letter county)
-            if p.startswith("B"):
-                # B + 2/3 digits + 3 letters
-                m = re.match(r"^B(\d{2,3})([A-Z]{3})$", p)
-                if m:
-                    return f"B {m.group(1)} {m.group(2)}"
-            # two-letter county
-            m = re.match(r"^([A-Z]{2})(\d{2,3})([A-Z]{3})$", p)
-            if m:
-                return f"{m.group(1)} {m.group(2)} {m.group(3)}"
-        return p  # fallback
-
-    # --- read PDF as ordered blocks -----------------------------------------
+    boundary = multipart_boundary(request.headers.get("content-type"))
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+    return batch_response(request, boundary)
+
+
+# ---------- BACKGROUND JOBS (processed by `python -m app.worker`) ----------
+async def _submitted(job_type: str, params: dict) -> JSONResponse:
+    job_id = await submit_job(job_type, params)
+    return JSONResponse({"job_id": job_id, "status_url": f"/jobs/{job_id}"}, status_code=202)
+
+
+@app.post("/jobs/import_pdf")
+async def submit_import_pdf(file: UploadFile = File(...)):
+    """Store the PDF now, extract in the background; the job result carries the draft_id for /add."""
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files allowed")
     try:
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            blocks_all = []
-            for page in doc:
-                blocks = page.get_text("blocks")  # (x0,y0,x1,y1,text, block_no, ...)
-                # sort by y then x to reconstruct reading order
-                blocks = sorted(blocks, key=lambda b: (round(b[1]), round(b[0])))
-                blocks_all.extend([norm_ws(b[4]) for b in blocks if b[4].strip()])
-            text = "\n".join(blocks_all)
-    except Exception as e:
-        print("PDF parse error:", e)
-        return {}
-
-    text_flat = norm_ws(text)
-    text_lc = text_flat.lower()
-
-    # --- search helpers (label proximity) ------------------------------------
-    def find_after(labels, max_chars=120):
-        """
-        Find the first occurrence of any label and return up to max_chars after it.
-        """
-        for lab in labels:
-            i = text_lc.find(lab.lower())
-            if i != -1:
-                seg = text_flat[i : i + len(lab) + max_chars]
-                return seg
-        return ""
-
-    # --- VIN (global, very reliable) -----------------------------------------
-    # VIN is 17 chars, excludes I,O,Q
-    vin = ""
-    vin_match = re.search(r"\b([A-HJ-NPR-Z0-9]{17})\b", text_flat)
-    if vin_match:
-        vin = vin_match.group(1)
-
-    # If not found, look near likely labels
-    if not vin:
-        near_vin = find_after(["VIN", "Serie șasiu", "Serie sasiu", "Serie CIV", "Serie"])
-        m = re.search(r"\b([A-HJ-NPR-Z0-9]{17})\b", near_vin)
-        vin = m.group(1) if m else ""
-
-    # --- Plate (global + normalized) -----------------------------------------
-    plate = ""
-    # AA 99 AAA or B 99 AAA (spaces optional in PDF)
-    plate_pat = r"\b((?:[A-Z]{2}\s?\d{2,3}\s?[A-Z]{3})|(?:B\s?\d{2,3}\s?[A-Z]{3}))\b"
-    m = re.search(plate_pat, text_flat)
-    if not m:
-        # look near labels
-        near_plate = find_after(
-            ["nr. înmatriculare", "nr inmatriculare", "număr înmatriculare",
-             "numar inmatriculare", "înregistrare", "inregistrare"], max_chars=80
-        )
-        m = re.search(plate_pat, near_plate)
-    if m:
-        plate = normalize_plate(m.group(1))
-
-    # --- Dates: prefer "de la ... / până la ..." context ---------------------
-    start, end = "", ""
-
-    # Capture within same small window
-    window = find_after(["valabilitate contract", "perioada de asigurare", "valabilitate"], max_chars=200)
-    m1 = re.search(r"de la\s*(\d{2}[./-]\d{2}[./-]\d{4})", window, flags=re.IGNORECASE)
-    m2 = re.search(r"p[aă]n[ăa]\s*la\s*(\d{2}[./-]\d{2}[./-]\d{4})", window, flags=re.IGNORECASE)
-    if m1:
-        start = to_iso(m1.group(1))
-    if m2:
-        end = to_iso(m2.group(1))
-
-    # Fallback: choose earliest as start, latest as end
-    if not start or not end:
-        all_dates = re.findall(r"(\d{2}[./-]\d{2}[./-]\d{4})", text_flat)
-        parsed = []
-        for d in all_dates:
-            iso = to_iso(d)
-            if iso:
-                parsed.append(datetime.strptime(iso, "%Y-%m-%d"))
-        parsed = sorted(set(parsed))
-        if parsed:
-            if not start:
-                start = parsed[0].strftime("%Y-%m-%d")
-            if not end and len(parsed) > 1:
-                # choose the farthest in future from start
-                end = parsed[-1].strftime("%Y-%m-%d")
-
-    # --- Name: search near common labels, prefer ALLCAPS tokens --------------
-    name = ""
-    near_name = find_after(
-        ["asigurat", "proprietar", "utilizator", "asigurat proprietar"], max_chars=120
-    )
-    # Strategy: pick 2–4 consecutive uppercase words (with diacritics allowed)
-    cap_word = r"[A-ZĂÂÎȘȚ][A-ZĂÂÎȘȚ\-']+"
-    m = re.search(rf"({cap_word}(?:\s+{cap_word}){{1,3}})", near_name)
-    if m:
-        name = m.group(1)
-    else:
-        # secondary: generic full name pattern anywhere
-        m2 = re.search(rf"\b({cap_word}\s+{cap_word}(?:\s+{cap_word})?)\b", text_flat)
-        if m2:
-            name = m2.group(1)
-
-    # Final cleanups
-    name = name.strip()
-    vin = vin.strip()
-    plate = plate.strip()
-
-    return {
-        "name": name,
-        "vin_number": vin,
-        "plate_number": plate,
-        "insurance_start": start,
-        "insurance_end": end,
-    }
\ No newline at end of file
+        document = await store_upload(app.state.fs_bucket, file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"{e} exceeds the {MAX_UPLOAD_MB} MB upload limit")
+    return await _submitted("import_pdf", {"document": document})
+
+
+@app.post("/jobs/export_selected_csv")
+async def submit_export_selected_csv(selection_id: str | None = Form(None), selected_ids: str | None = Form(None)):
+    selection = await _selection(selection_id, selected_ids)
+    return await _submitted("export_selected_csv", {"selection_id": selection["_id"]})
+
+
+@app.post("/jobs/delete_records")
+async def submit_delete_records(selection_id: str | None = Form(None), selected_ids: str | None = Form(None)):
+    selection = await _selection(selection_id, selected_ids)
+    return await _submitted("delete_records", {"selection_id": selection["_id"]})
+
+
+@app.post("/jobs/reextract")
+async def submit_reextract():
+    return await _submitted("reextract", {})
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(job_status(job))
+
+
+@app.get("/jobs/{job_id}/result")
+async def download_job_result(job_id: str):
+    job = await get_job(job_id)
+    if job is None or not job.get("result_file_id"):
+        raise HTTPException(status_code=404, detail="Job result not found")
+    grid_out = await open_document(app.state.fs_bucket, str(job["result_file_id"]))
+    if grid_out is None:
+        raise HTTPException(status_code=404, detail="Job result not found")
+    headers = {
+        "Content-Disposition": content_disposition(job.get("result_filename") or grid_out.filename),
+        "Content-Length": str(grid_out.length),
+    }
+    return StreamingResponse(iter_chunks(grid_out), media_type=document_content_type(grid_out), headers=headers)
@@ -0,0 +1,86 @@
+# app/migrations.py
+"""
+One-off data migrations. Run from the project root:
+
+    python -m app.migrations
+"""
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo.errors import OperationFailure
+
+from .database import db, records_col, files_col
+from .drafts import drafts_col
+
+
+async def backfill_current_insurance():
+    """Populate current_insurance / next_expiry on records written before they existed."""
+    result = await records_col.update_many(
+        {"current_insurance": {"$exists": False}},
+        [
+            {"$set": {"current_insurance": {"$arrayElemAt": ["$insurances", -1]}}},
+            {"$set": {"next_expiry": {"$ifNull": ["$current_insurance.insurance_end", None]}}},
+        ],
+    )
+    print(f"✅ Backfilled current_insurance on {result.modified_count} records")
+
+
+async def backfill_updated_at():
+    """Records written before updated_at existed count as changed when they were created."""
+    result = await records_col.update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": "$created_at"}}],
+    )
+    print(f"✅ Backfilled updated_at on {result.modified_count} records")
+
+
+async def merge_duplicate_documents():
+    """
+    Merge live GridFS copies of the same content (stored before dedup was
+    atomic) into the oldest one, so the unique metadata_sha256_live index can
+    be built, and drop the old non-unique metadata_sha256 index.
+    """
+    await files_col.update_many(
+        {"metadata.sha256": {"$exists": True}, "metadata.refs": {"$exists": False}},
+        {"$set": {"metadata.refs": 1}},
+    )
+    groups = files_col.aggregate([
+        {"$match": {"metadata.sha256": {"$exists": True}, "metadata.refs": {"$gt": 0}}},
+        {"$sort": {"uploadDate": 1}},
+        {"$group": {"_id": "$metadata.sha256", "ids": {"$push": "$_id"}, "refs": {"$sum": "$metadata.refs"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ])
+    bucket = AsyncIOMotorGridFSBucket(db)
+    merged = 0
+    async for group in groups:
+        keep, duplicates = group["ids"][0], group["ids"][1:]
+        for col in (records_col, drafts_col):
+            await col.update_many(
+                {"documents.file_id": {"$in": duplicates}},
+                {"$set": {"documents.$[doc].file_id": keep}},
+                array_filters=[{"doc.file_id": {"$in": duplicates}}],
+            )
+        await files_col.update_one({"_id": keep}, {"$set": {"metadata.refs": group["refs"]}})
+        for file_id in duplicates:
+            await bucket.delete(file_id)
+        merged += len(duplicates)
+    print(f"✅ Merged {merged} duplicate documents")
+
+    try:
+        await files_col.drop_index("metadata_sha256")
+        print("✅ Dropped index fs.files.metadata_sha256")
+    except OperationFailure:
+        pass  # already gone
+
+
+MIGRATIONS = [backfill_current_insurance, backfill_updated_at, merge_duplicate_documents]
+
+
+async def main():
+    for migration in MIGRATIONS:
+        print(f"▶️ Running {migration.__name__}")
+        await migration()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
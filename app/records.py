@@ -0,0 +1,42 @@
+# app/records.py
+"""
+Helpers that keep the denormalized policy fields on insurance records in sync.
+
+Every record carries, next to the full `insurances` history:
+  - current_insurance: copy of the latest entry of `insurances`
+  - next_expiry:       its insurance_end, indexed for expiry queries / sorts
+and an updated_at timestamp, moved on every write (incremental exports).
+Deleted records leave a tombstone in `deleted_records` ({_id, deleted_at})
+for TOMBSTONE_TTL_DAYS, so incremental exports can report deletions too.
+"""
+import os
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from .database import db, records_col
+
+TOMBSTONE_TTL_DAYS = int(os.getenv("TOMBSTONE_TTL_DAYS", "90"))
+
+deleted_records_col = db["deleted_records"]
+
+
+def current_insurance_fields(insurances: list) -> dict:
+    """Top-level fields derived from an insurance history (latest entry wins)."""
+    current = insurances[-1] if insurances else None
+    return {
+        "current_insurance": current,
+        "next_expiry": current.get("insurance_end") if current else None,
+    }
+
+
+async def delete_records(ids: list) -> int:
+    """Delete records by id, leaving a tombstone for each; returns how many were deleted."""
+    if not ids:
+        return 0
+    now = datetime.utcnow()
+    # tombstones first, so a crash in between never loses one (a retry rewrites them)
+    await deleted_records_col.bulk_write(
+        [UpdateOne({"_id": oid}, {"$set": {"deleted_at": now}}, upsert=True) for oid in ids], ordered=False)
+    result = await records_col.delete_many({"_id": {"$in": ids}})
+    return result.deleted_count
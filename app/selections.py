@@ -0,0 +1,122 @@
+# app/selections.py
+"""
+Server-side selection sets. A selection is created once, from an ID list or
+from a named filter (e.g. "expiring" within N days), and then referenced by
+its id from exports and bulk jobs instead of posting every ObjectId again.
+
+Members live one per document in `selection_items` ({selection_id,
+record_id}), so a selection is never bound by the 16 MB document limit; a
+filter selection is materialized server-side with $merge. Consumers walk the
+members in record_id order and load records in chunked $in batches of
+SELECTION_CHUNK_SIZE. Both collections expire through TTL indexes after
+SELECTION_TTL_HOURS.
+"""
+import os
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from .database import db, records_col
+
+SELECTION_TTL_HOURS = int(os.getenv("SELECTION_TTL_HOURS", "24"))
+SELECTION_CHUNK_SIZE = int(os.getenv("SELECTION_CHUNK_SIZE", "1000"))
+
+selections_col = db["selections"]
+selection_items_col = db["selection_items"]
+
+
+class UnknownFilter(Exception):
+    pass
+
+
+def _today():
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# name -> fn(days) building the records query
+SELECTION_FILTERS = {
+    "all": lambda days: {},
+    "expiring": lambda days: {"next_expiry": {"$gte": _today(), "$lte": _today() + timedelta(days=days)}},
+    "expired": lambda days: {"next_expiry": {"$lt": _today()}},
+}
+
+
+async def _new_selection(source: dict) -> ObjectId:
+    result = await selections_col.insert_one({**source, "count": 0, "created_at": datetime.utcnow()})
+    return result.inserted_id
+
+
+async def _finish(selection_id: ObjectId) -> dict:
+    count = await selection_items_col.count_documents({"selection_id": selection_id})
+    await selections_col.update_one({"_id": selection_id}, {"$set": {"count": count}})
+    return await selections_col.find_one({"_id": selection_id})
+
+
+async def create_selection_from_ids(ids: list) -> dict:
+    """Selection of the given record ids (invalid or duplicate ids are dropped)."""
+    oids = sorted({ObjectId(i) for i in ids if ObjectId.is_valid(i)})
+    selection_id = await _new_selection({"source": "ids"})
+    now = datetime.utcnow()
+    for start in range(0, len(oids), SELECTION_CHUNK_SIZE):
+        await selection_items_col.insert_many([
+            {"selection_id": selection_id, "record_id": oid, "created_at": now}
+            for oid in oids[start:start + SELECTION_CHUNK_SIZE]
+        ], ordered=False)
+    return await _finish(selection_id)
+
+
+async def create_selection_from_filter(name: str, days: int = 30) -> dict:
+    """Selection of every record matching a SELECTION_FILTERS filter, evaluated now."""
+    if name not in SELECTION_FILTERS:
+        raise UnknownFilter(name)
+    selection_id = await _new_selection({"source": "filter", "filter": name, "days": days})
+    # members are written by the server, nothing travels through the app
+    await records_col.aggregate([
+        {"$match": SELECTION_FILTERS[name](days)},
+        {"$project": {"_id": 0, "selection_id": {"$literal": selection_id}, "record_id": "$_id",
+                      "created_at": {"$literal": datetime.utcnow()}}},
+        {"$merge": {"into": selection_items_col.name}},
+    ]).to_list(length=None)
+    return await _finish(selection_id)
+
+
+async def get_selection(selection_id: str):
+    try:
+        oid = ObjectId(selection_id)
+    except InvalidId:
+        return None
+    return await selections_col.find_one({"_id": oid})
+
+
+def selection_status(selection: dict) -> dict:
+    return {
+        "selection_id": str(selection["_id"]),
+        "source": selection["source"],
+        "filter": selection.get("filter"),
+        "count": selection["count"],
+        "expires_at": (selection["created_at"] + timedelta(hours=SELECTION_TTL_HOURS)).isoformat(),
+    }
+
+
+async def iter_id_chunks(selection_id: ObjectId, chunk_size: int = SELECTION_CHUNK_SIZE):
+    """Record ids of a selection, chunk_size at a time, keyset-paginated on record_id."""
+    last = None
+    while True:
+        query = {"selection_id": selection_id}
+        if last is not None:
+            query["record_id"] = {"$gt": last}
+        items = await selection_items_col.find(query, {"_id": 0, "record_id": 1}) \
+            .sort("record_id", 1).limit(chunk_size).to_list(length=chunk_size)
+        if not items:
+            return
+        chunk = [i["record_id"] for i in items]
+        yield chunk
+        last = chunk[-1]
+
+
+async def iter_selected_records(selection_id: ObjectId, projection: dict, chunk_size: int = SELECTION_CHUNK_SIZE):
+    """Records of a selection (one $in query per chunk), as an async iterator like a cursor."""
+    async for chunk in iter_id_chunks(selection_id, chunk_size):
+        async for d in records_col.find({"_id": {"$in": chunk}}, projection).sort("_id", 1):
+            yield d
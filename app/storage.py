@@ -0,0 +1,268 @@
+# app/storage.py
+"""GridFS helpers for the policy documents attached to records."""
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from urllib.parse import quote
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import FileExists, NoFile
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from .database import files_col, records_col
+
+# read uploads in GridFS-sized pieces (the default chunk size is 255 KiB)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(255 * 1024)))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "25"))
+# how many files of one request are streamed into GridFS at the same time
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+# ---------- UPLOADS ----------
+# Stored files are content-addressed: one GridFS file per distinct SHA-256,
+# shared by every record that attached it. fs.files metadata.refs counts the
+# record references (files stored before dedup have no counter and count as 1).
+# A unique partial index allows one live copy (refs > 0) per digest.
+_REFS = {"$ifNull": ["$metadata.refs", 1]}
+
+
+async def acquire_existing(sha256: str):
+    """Take a reference on a live stored copy of this content, if there is one."""
+    return await files_col.find_one_and_update(
+        {"metadata.sha256": sha256, "metadata.refs": {"$not": {"$lte": 0}}},
+        [{"$set": {"metadata.refs": {"$add": [_REFS, 1]}}}],
+        projection={"_id": 1},
+    )
+
+
+async def release_document(bucket, file_id):
+    """Drop one record reference; the GridFS file is deleted with its last reference."""
+    doc = await files_col.find_one_and_update(
+        {"_id": file_id},
+        [{"$set": {"metadata.refs": {"$add": [_REFS, -1]}}}],
+        projection={"metadata.refs": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc and doc["metadata"]["refs"] <= 0:
+        try:
+            await bucket.delete(file_id)
+        except NoFile:
+            pass
+
+
+async def release_documents(bucket, file_ids):
+    for file_id in file_ids:
+        await release_document(bucket, file_id)
+
+
+def _hash_file(file, filename: str, max_bytes: int):
+    """SHA-256 and size of a spooled upload, read in chunks (runs in the threadpool); rewinds it."""
+    sha256 = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while chunk := file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(filename)
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest(), size
+
+
+async def store_upload(bucket, upload, max_bytes: int = MAX_UPLOAD_MB * 1024 * 1024) -> dict:
+    """
+    Store an UploadFile, returning the document entry kept on the record.
+    The spooled upload is hashed first (off the event loop); content already
+    stored is referenced, not written again. Otherwise the upload is piped into
+    GridFS chunk by chunk; if a concurrent upload of the same content wins the
+    insert (the unique metadata.sha256 index rejects ours), our chunks are
+    dropped and that copy is referenced. Raises UploadTooLarge once max_bytes
+    is exceeded.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(upload.filename)
+    sha256, size = await run_in_threadpool(_hash_file, upload.file, upload.filename, max_bytes)
+
+    while True:
+        existing = await acquire_existing(sha256)
+        if existing:
+            file_id = existing["_id"]
+            break
+        metadata = {"type": upload.content_type, "sha256": sha256, "size": size, "refs": 1}
+        grid_in = bucket.open_upload_stream(upload.filename, metadata=metadata)
+        try:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                await grid_in.write(chunk)
+            await grid_in.close()
+            file_id = grid_in._id
+            break
+        except FileExists:
+            # lost the race for this digest: reference the winner on the next pass
+            # (or store ours after all if its last reference was released meanwhile)
+            await grid_in.abort()
+            await upload.seek(0)
+        except BaseException:
+            await grid_in.abort()
+            raise
+
+    return {
+        "file_id": file_id,
+        "filename": upload.filename,
+        "content_type": upload.content_type,
+        "size": size,
+        "sha256": sha256,
+        "uploaded_at": datetime.utcnow(),
+    }
+
+
+async def store_uploads(bucket, uploads, concurrency: int = UPLOAD_CONCURRENCY) -> list:
+    """
+    Store several uploads concurrently (at most `concurrency` at once), keeping
+    their order. If any upload fails the others are cancelled and every
+    reference already taken is released again before the error is re-raised.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def store_one(upload):
+        async with semaphore:
+            return await store_upload(bucket, upload)
+
+    tasks = [asyncio.create_task(store_one(u)) for u in uploads]
+    if not tasks:
+        return []
+    await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+
+    failed = [t for t in tasks if t.done() and not t.cancelled() and t.exception()]
+    if not failed:
+        return [t.result() for t in tasks]
+
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    stored = [t.result() for t in tasks if not t.cancelled() and not t.exception()]
+    await release_documents(bucket, [d["file_id"] for d in stored])
+    raise failed[0].exception()
+
+
+# ---------- DOWNLOADS ----------
+async def open_document(bucket, file_id: str):
+    """Open a stored document for streaming; returns None if the id is bad or unknown."""
+    try:
+        return await bucket.open_download_stream(ObjectId(file_id))
+    except (InvalidId, NoFile):
+        return None
+
+
+async def read_document(bucket, file_id) -> bytes:
+    """Whole content of a stored document (for server-side processing such as extraction)."""
+    grid_out = await bucket.open_download_stream(file_id)
+    try:
+        return await grid_out.read()
+    finally:
+        grid_out.close()
+
+
+async def document_entry(file_id: str, record_id: str = None):
+    """
+    The document entry a record keeps for a stored file (its own filename and
+    content type, which differ per uploader of shared content); None if unknown.
+    """
+    try:
+        query = {"documents.file_id": ObjectId(file_id)}
+        if record_id:
+            query["_id"] = ObjectId(record_id)
+    except InvalidId:
+        return None
+    record = await records_col.find_one(query, {"documents.$": 1})
+    return record["documents"][0] if record else None
+
+
+def document_content_type(grid_out) -> str:
+    """Content type recorded at upload time (add_record stores it as metadata.type)."""
+    metadata = grid_out.metadata or {}
+    return metadata.get("type") or "application/octet-stream"
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """Content-Disposition with an ASCII fallback plus the RFC 5987 UTF-8 filename."""
+    fallback = filename.encode("ascii", "replace").decode().replace('"', "").replace("?", "_")
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+# ---------- CACHING / RANGES ----------
+# Stored documents are never modified in place, so clients may keep them for a year.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def document_etag(grid_out) -> str:
+    """Strong ETag from the stored content digest, or the immutable file id for older uploads."""
+    metadata = grid_out.metadata or {}
+    digest = metadata.get("sha256") or str(grid_out._id)
+    return f'"{digest}"'
+
+
+def document_last_modified(grid_out) -> str:
+    return format_datetime(grid_out.upload_date.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored, '*' matches anything."""
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags
+
+
+def parse_range(header: str, length: int):
+    """
+    Parse a single 'bytes=' range into inclusive (start, end) offsets.
+    Returns None for headers we choose to ignore (other units, multiple ranges,
+    garbage) so the full file is served; raises RangeNotSatisfiable otherwise.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), length - 1) if last else length - 1
+        else:
+            # suffix range: the last N bytes
+            start, end = max(length - int(last), 0), length - 1
+    except ValueError:
+        return None
+    if start >= length or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+async def iter_chunks(grid_out, start: int = 0, size: int = None):
+    """
+    Yield the stored file one GridFS chunk at a time, never buffering the whole file.
+    With start/size only that byte window is read, seeking the stream first.
+    """
+    remaining = grid_out.length - start if size is None else size
+    try:
+        if start:
+            grid_out.seek(start)
+        while remaining > 0 and (chunk := await grid_out.readchunk()):
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        grid_out.close()
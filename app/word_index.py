@@ -0,0 +1,96 @@
+# app/word_index.py
+"""
+Per-page spatial index over PyMuPDF word boxes, used to resolve a field as
+"the value tokens right of (same line) or below its label" instead of
+"the next N characters after the label in flattened text", which mixes up
+columns on multi-column layouts.
+
+Words are bucketed into horizontal bands GRID_CELL points high, so looking
+around a label only touches the one or two bands it spans. A full x/y grid
+cost more to build per page than every lookup on it saved. Labels themselves are
+located by app.label_scanner.
+"""
+from collections import defaultdict
+
+GRID_CELL = 32.0
+# how far right of a label (same line) a value may start
+RIGHT_REACH = 260.0
+# horizontal gap that ends a value: the next column starts after it
+COLUMN_GAP = 30.0
+# how far below a label (about two lines) and how wide under it values are read
+BELOW_REACH = 30.0
+BELOW_WIDTH = 220.0
+
+
+class WordIndex:
+    """Grid index over one page's words: (x0, y0, x1, y1, text, block_no, line_no, word_no)."""
+
+    def __init__(self, words: list):
+        self.words = words
+        # one band per GRID_CELL points of height, by word centre; x is filtered per lookup
+        self.rows = defaultdict(list)
+        for i, w in enumerate(words):
+            self.rows[int((w[1] + w[3]) / 2 // GRID_CELL)].append(i)
+
+    def box(self, first: int, last: int):
+        """Bounding box (x0, y0, x1, y1) of the words first..last (one line)."""
+        a, b = self.words[first], self.words[last]
+        return a[0], min(a[1], b[1]), b[2], max(a[3], b[3])
+
+    # ---------- neighbourhood ----------
+    def _in_cells(self, x0, y0, x1, y1) -> list:
+        words = self.words
+        return [
+            i for cy in range(int(y0 // GRID_CELL), int(y1 // GRID_CELL) + 1)
+            for i in self.rows.get(cy, ()) if words[i][2] >= x0 and words[i][0] <= x1
+        ]
+
+    def right_of(self, box) -> list:
+        """Words on the label's line to its right, up to the next column gap or label."""
+        x0, y0, x1, y1 = box
+        candidates = [
+            self.words[i] for i in self._in_cells(x1, y0, x1 + RIGHT_REACH, y1)
+            if self.words[i][0] >= x1 - 1 and y0 <= (self.words[i][1] + self.words[i][3]) / 2 <= y1
+        ]
+        candidates.sort(key=lambda w: w[0])
+        value, edge = [], None
+        for w in candidates:
+            if (edge is not None and w[0] - edge > COLUMN_GAP) or w[4].endswith(":"):
+                break
+            value.append(w)
+            edge = w[2]
+        return value
+
+    def below(self, box) -> list:
+        """Words on the lines just under the label, within its column."""
+        x0, y0, x1, y1 = box
+        left, right = x0 - 5, x0 + BELOW_WIDTH
+        candidates = [
+            self.words[i] for i in self._in_cells(left, y1, right, y1 + BELOW_REACH)
+            if self.words[i][1] >= y1 - 1 and self.words[i][1] <= y1 + BELOW_REACH
+            and self.words[i][2] > left and self.words[i][0] < right
+        ]
+        candidates.sort(key=lambda w: (round(w[1]), w[0]))
+        return candidates
+
+    def value_near(self, box) -> str:
+        """Value text next to a label: its line first, then the lines below, one per text line."""
+        lines = [" ".join(w[4] for w in self.right_of(box))]
+        current_y = None
+        for w in self.below(box):
+            if current_y is None or abs(w[1] - current_y) > 2:
+                lines.append("")
+                current_y = w[1]
+            lines[-1] = f"{lines[-1]} {w[4]}" if lines[-1] else w[4]
+        return "\n".join(line for line in lines if line)
+
+    # ---------- reading order ----------
+    def blocks(self) -> list:
+        """Block texts sorted by y then x, like page.get_text('blocks') in reading order."""
+        grouped = {}
+        for w in self.words:
+            b = grouped.setdefault(w[5], [w[0], w[1], []])
+            b[0], b[1] = min(b[0], w[0]), min(b[1], w[1])
+            b[2].append(w[4])
+        ordered = sorted(grouped.values(), key=lambda b: (round(b[1]), round(b[0])))
+        return [" ".join(b[2]) for b in ordered]
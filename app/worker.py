@@ -0,0 +1,71 @@
+# app/worker.py
+"""
+Background job worker. Run from the project root (as many as needed):
+
+    python -m app.worker
+
+JOB_CONCURRENCY jobs run at once per worker; an idle worker polls the queue
+every JOB_POLL_SECONDS. SIGTERM / Ctrl+C stops claiming new jobs and lets the
+running ones finish.
+"""
+import asyncio
+import os
+import signal
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from . import job_handlers  # noqa: F401  (registers the handlers)
+from .database import db
+from .extraction_pool import extraction_pool
+from .jobs import claim_job, run_job, purge_jobs, new_worker_id
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+PURGE_EVERY_SECONDS = 3600
+
+
+async def work(slot: int, worker_id: str, bucket, stopping: asyncio.Event):
+    while not stopping.is_set():
+        job = await claim_job(worker_id)
+        if job is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        print(f"▶️ [{slot}] Job {job['_id']} ({job['type']}), attempt {job['attempts']}")
+        await run_job(job, worker_id, bucket)
+
+
+async def purge_loop(bucket, stopping: asyncio.Event):
+    while not stopping.is_set():
+        purged = await purge_jobs(bucket)
+        if purged:
+            print(f"🧹 Purged {purged} finished jobs")
+        try:
+            await asyncio.wait_for(stopping.wait(), PURGE_EVERY_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    worker_id = new_worker_id()
+    bucket = AsyncIOMotorGridFSBucket(db)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    print(f"✅ Worker {worker_id} started ({JOB_CONCURRENCY} slots)")
+    try:
+        await asyncio.gather(
+            purge_loop(bucket, stopping),
+            *(work(slot, worker_id, bucket, stopping) for slot in range(JOB_CONCURRENCY)),
+        )
+    finally:
+        extraction_pool.shutdown()
+    print(f"👋 Worker {worker_id} stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+"""
+Dashboard query benchmark: legacy find() + Python loop vs. the aggregation pipeline.
+
+Seeds a scratch collection with synthetic records (full insurance history and
+document references, like production data) and times building the dashboard
+rows both ways, for the whole collection and for a single page.
+
+    MONGO_URI=mongodb://localhost:27017/insurance python -m benchmarks.dashboard_bench
+    python -m benchmarks.dashboard_bench --sizes 10000 100000 --page-size 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.dashboard import dashboard_projection
+from app.records import current_insurance_fields
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/insurance")
+BENCH_COLLECTION = "bench_dashboard_records"
+
+
+def make_record(i: int, now: datetime) -> dict:
+    created = now - timedelta(minutes=i)
+    insurances = []
+    start = created - timedelta(days=365 * random.randint(0, 4))
+    for _ in range(random.randint(1, 5)):
+        insurances.append({
+            "insurance_start": start,
+            "insurance_end": start + timedelta(days=365),
+            "created_at": start,
+        })
+        start += timedelta(days=365)
+    record = {
+        "name": f"POPESCU ION {i}",
+        "phone": f"+40{random.randint(700000000, 799999999)}",
+        "car_name": "Dacia Logan",
+        "plate_number": f"IS {i % 100:02d} ABC",
+        "vin_number": f"UU1{i:014d}",
+        "documents": [{
+            "file_id": ObjectId(),
+            "filename": f"polita_{i}_{n}.pdf",
+            "content_type": "application/pdf",
+            "uploaded_at": created,
+        } for n in range(random.randint(0, 3))],
+        "insurances": insurances,
+        "created_at": created,
+    }
+    record.update(current_insurance_fields(insurances))
+    return record
+
+
+async def seed(col, size: int):
+    await col.drop()
+    now = datetime.utcnow()
+    batch = []
+    for i in range(size):
+        batch.append(make_record(i, now))
+        if len(batch) == 5000:
+            await col.insert_many(batch)
+            batch = []
+    if batch:
+        await col.insert_many(batch)
+    await col.create_index([("created_at", -1), ("_id", -1)])
+
+
+async def legacy_rows(col, limit: int):
+    """The pre-pipeline home(): whole documents, latest policy picked in Python."""
+    cursor = col.find().sort("created_at", -1)
+    if limit:
+        cursor = cursor.limit(limit)
+    data = await cursor.to_list(length=None)
+    items = []
+    for d in data:
+        latest_ins = d.get("insurances", [{}])[-1] if d.get("insurances") else {}
+        end = latest_ins.get("insurance_end")
+        days_left = (end.date() - datetime.utcnow().date()).days if end else None
+        items.append({
+            "id": str(d["_id"]),
+            "name": d.get("name"),
+            "phone": d.get("phone"),
+            "car_name": d.get("car_name"),
+            "plate_number": d.get("plate_number"),
+            "vin_number": d.get("vin_number"),
+            "insurance_start": latest_ins.get("insurance_start").date() if latest_ins.get("insurance_start") else "",
+            "insurance_end": end.date() if end else "",
+            "days_left": days_left,
+            "documents": d.get("documents", []),
+        })
+    return items
+
+
+async def pipeline_rows(col, limit: int):
+    pipeline = [{"$sort": {"created_at": -1, "_id": -1}}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline += dashboard_projection(datetime.utcnow())
+    return await col.aggregate(pipeline).to_list(length=None)
+
+
+async def measure(fn, col, limit: int, repeat: int):
+    timings = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = await fn(col, limit)
+        timings.append(time.perf_counter() - t0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, len(rows)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch collection afterwards")
+    args = parser.parse_args()
+
+    random.seed(42)
+    client = AsyncIOMotorClient(MONGO_URI)
+    col = client.get_default_database()[BENCH_COLLECTION]
+
+    print(f"{'records':>8} {'scope':>6} {'variant':>9} {'rows':>7} {'best ms':>9} {'peak MiB':>9}")
+    for size in args.sizes:
+        await seed(col, size)
+        for scope, limit in (("all", 0), ("page", args.page_size)):
+            for variant, fn in (("legacy", legacy_rows), ("pipeline", pipeline_rows)):
+                best, peak, rows = await measure(fn, col, limit, args.repeat)
+                print(f"{size:>8} {scope:>6} {variant:>9} {rows:>7} {best * 1000:>9.1f} {peak / 2**20:>9.1f}")
+
+    if not args.keep:
+        await col.drop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
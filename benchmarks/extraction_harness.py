@@ -0,0 +1,175 @@
+"""
+Offline accuracy / latency / memory harness for extract_insurance_data.
+
+Runs the extractor over the synthetic corpus from benchmarks.policy_corpus and
+reports, per layout and overall, per-field accuracy, p50/p95 wall-clock
+latency (best of --repeat runs per document) and peak memory (Python heap
+via tracemalloc, per document, plus the process max RSS). Results are compared
+with a stored baseline and the run exits non-zero when any field's accuracy
+drops more than --accuracy-drop, peak memory grows more than --memory-growth,
+or the overall p50/p95 latency ratio grows more than --latency-growth.
+
+Latency is gated as a ratio to benchmarks.legacy_extractor timed on the same
+documents in the same run, so the committed baseline holds on any machine;
+absolute milliseconds are only reported (per-layout latencies are too few
+samples to gate on at all).
+
+    python -m benchmarks.extraction_harness
+    python -m benchmarks.extraction_harness --docs 200 --seed 7
+    python -m benchmarks.extraction_harness --update-baseline
+"""
+import argparse
+import json
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+from app.extractor import extract_insurance_data
+from benchmarks.legacy_extractor import extract_insurance_data as legacy_extract_insurance_data
+from benchmarks.policy_corpus import LAYOUTS, generate
+
+BASELINE_PATH = Path(__file__).parent / "extraction_baseline.json"
+FIELDS = ("name", "vin_number", "plate_number", "insurance_start", "insurance_end")
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, int(round(len(ordered) * q)) - 1)]
+
+
+def best_ms(fn, pdf_bytes: bytes, repeat: int) -> float:
+    """Best of `repeat` untraced runs: scheduler noise only ever adds time."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(pdf_bytes)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+
+def run(docs: int, seed: int, repeat: int = 3, show_misses: int = 0) -> dict:
+    corpus = list(generate(docs, seed))
+    # warm up imports and lazily built state outside the measurement
+    extract_insurance_data(corpus[0][2])
+    legacy_extract_insurance_data(corpus[0][2])
+
+    hits = defaultdict(lambda: defaultdict(int))
+    counts = defaultdict(int)
+    latency = defaultdict(list)
+    legacy_latency = defaultdict(list)
+    peak_kib = defaultdict(float)
+    misses = []
+    for doc_id, layout, pdf_bytes, expected in corpus:
+        tracemalloc.start()
+        got = extract_insurance_data(pdf_bytes)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        elapsed_ms = best_ms(extract_insurance_data, pdf_bytes, repeat)
+        legacy_ms = best_ms(legacy_extract_insurance_data, pdf_bytes, repeat)
+
+        for group in (layout, "all"):
+            counts[group] += 1
+            latency[group].append(elapsed_ms)
+            legacy_latency[group].append(legacy_ms)
+            peak_kib[group] = max(peak_kib[group], peak / 1024)
+            for field in FIELDS:
+                hits[group][field] += got.get(field) == expected[field]
+        misses += [(doc_id, f, expected[f], got.get(f)) for f in FIELDS if got.get(f) != expected[f]]
+
+    for doc_id, field, want, got in misses[:show_misses]:
+        print(f"  miss {doc_id} {field}: expected {want!r}, got {got!r}")
+
+    return {
+        "docs": docs,
+        "seed": seed,
+        "layouts": {
+            group: {
+                "docs": counts[group],
+                "accuracy": {f: round(hits[group][f] / counts[group], 4) for f in FIELDS},
+                "p50_ms": round(statistics.median(latency[group]), 3),
+                "p95_ms": round(percentile(latency[group], 0.95), 3),
+                # engine / legacy latency on the same documents and machine
+                "p50_ratio": round(statistics.median(latency[group]) / statistics.median(legacy_latency[group]), 3),
+                "p95_ratio": round(percentile(latency[group], 0.95) / percentile(legacy_latency[group], 0.95), 3),
+                "peak_kib": round(peak_kib[group], 1),
+            }
+            for group in (*LAYOUTS, "all") if counts[group]
+        },
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def print_report(report: dict):
+    print(f"{'layout':>10} {'docs':>5} " + " ".join(f"{f[:10]:>10}" for f in FIELDS)
+          + f" {'p50 ms':>8} {'p95 ms':>8} {'p50 ×leg':>8} {'p95 ×leg':>8} {'peak KiB':>9}")
+    for group, r in report["layouts"].items():
+        print(f"{group:>10} {r['docs']:>5} " + " ".join(f"{r['accuracy'][f]:>10.1%}" for f in FIELDS)
+              + f" {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p50_ratio']:>8.2f} {r['p95_ratio']:>8.2f}"
+              + f" {r['peak_kib']:>9.1f}")
+    print(f"process max RSS: {report['max_rss_mib']} MiB")
+
+
+def regressions(report: dict, baseline: dict, accuracy_drop: float, latency_growth: float,
+                memory_growth: float) -> list:
+    problems = []
+    for group, base in baseline["layouts"].items():
+        cur = report["layouts"].get(group)
+        if cur is None:
+            continue
+        for field, acc in base["accuracy"].items():
+            if cur["accuracy"].get(field, 0) < acc - accuracy_drop:
+                problems.append(f"{group}/{field} accuracy {acc:.1%} -> {cur['accuracy'].get(field, 0):.1%}")
+        limits = [("peak_kib", memory_growth)]
+        if group == "all":
+            limits += [("p50_ratio", latency_growth), ("p95_ratio", latency_growth)]
+        for metric, growth in limits:
+            if metric in base and cur[metric] > base[metric] * (1 + growth):
+                problems.append(f"{group} {metric} {base[metric]} -> {cur[metric]} (+{growth:.0%} allowed)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=None, help="corpus size (default: the baseline's)")
+    parser.add_argument("--seed", type=int, default=None, help="corpus seed (default: the baseline's)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per document (best one counts)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--accuracy-drop", type=float, default=0.0, help="allowed absolute accuracy drop per field")
+    parser.add_argument("--latency-growth", type=float, default=0.5, help="allowed relative growth of the p50/p95 ratio to legacy")
+    parser.add_argument("--memory-growth", type=float, default=0.25, help="allowed relative peak memory growth")
+    parser.add_argument("--show-misses", type=int, default=10, help="print up to N wrong fields")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    docs = args.docs or (baseline or {}).get("docs", 120)
+    seed = args.seed if args.seed is not None else (baseline or {}).get("seed", 2024)
+
+    report = run(docs, seed, args.repeat, args.show_misses)
+    print_report(report)
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+    if baseline is None:
+        print("ℹ️ No baseline yet; run with --update-baseline to store one")
+        return
+    if (docs, seed) != (baseline["docs"], baseline["seed"]):
+        print("⚠️ Corpus differs from the baseline's (docs/seed); comparison is approximate")
+
+    problems = regressions(report, baseline, args.accuracy_drop, args.latency_growth, args.memory_growth)
+    if problems:
+        print("❌ Regressions against baseline:")
+        for p in problems:
+            print(f"  - {p}")
+        sys.exit(1)
+    print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
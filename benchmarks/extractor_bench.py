@@ -0,0 +1,85 @@
+"""
+Extraction microbenchmark: per-document CPU time of the legacy per-call
+extract_insurance_data vs. the rule engine in app.extractor, for a short
+(one page) policy and a long one (policy page followed by general conditions).
+
+    python -m benchmarks.extractor_bench
+    python -m benchmarks.extractor_bench --docs 200 --long-pages 40
+"""
+import argparse
+import statistics
+import time
+
+import fitz
+
+from app.extractor import extract_insurance_data
+from benchmarks.legacy_extractor import extract_insurance_data as legacy_extract_insurance_data
+
+POLICY_LINES = [
+    "POLIȚĂ DE ASIGURARE RCA",
+    "Asigurat: POPESCU ION MIHAI",
+    "Adresa: Str. Lalelelor nr. 5, Iași",
+    "Nr. înmatriculare: IS 12 ABC",
+    "Serie șasiu: UU1KSDAF123456789",
+    "Valabilitate contract: de la 01.03.2025 până la 28.02.2026",
+    "Data emiterii: 27.02.2025",
+]
+FILLER = "Asigurătorul acoperă prejudiciile produse terților prin accidente de vehicule. "
+
+
+def make_sample_pdf(pages: int = 1) -> bytes:
+    doc = fitz.open()
+    # embedded (not base-14) font so Romanian diacritics survive the round trip
+    font = fitz.Font("helv").buffer
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_font(fontname="ro", fontbuffer=font)
+        y = 72
+        lines = POLICY_LINES if n == 0 else []
+        for line in lines:
+            page.insert_text((72, y), line, fontname="ro", fontsize=10)
+            y += 16
+        for _ in range(30):
+            page.insert_text((72, y), FILLER[:90], fontname="ro", fontsize=8)
+            y += 12
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def measure(fn, pdf_bytes: bytes, docs: int):
+    cpu = []
+    for _ in range(docs):
+        t0 = time.process_time()
+        result = fn(pdf_bytes)
+        cpu.append(time.process_time() - t0)
+    return cpu, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--long-pages", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'layout':>6} {'pages':>5} {'variant':>8} {'docs':>5} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for layout, pages in (("short", 1), ("long", args.long_pages)):
+        pdf_bytes = make_sample_pdf(pages)
+        # warm up imports / caches once for both
+        legacy_extract_insurance_data(pdf_bytes)
+        extract_insurance_data(pdf_bytes)
+
+        results = {}
+        for variant, fn in (("legacy", legacy_extract_insurance_data), ("engine", extract_insurance_data)):
+            cpu, results[variant] = measure(fn, pdf_bytes, args.docs)
+            cpu_ms = sorted(c * 1000 for c in cpu)
+            p95 = cpu_ms[int(len(cpu_ms) * 0.95) - 1]
+            print(f"{layout:>6} {pages:>5} {variant:>8} {args.docs:>5} "
+                  f"{statistics.mean(cpu_ms):>8.3f} {statistics.median(cpu_ms):>8.3f} {p95:>8.3f}")
+
+        if results["legacy"] != results["engine"]:
+            print("⚠️ outputs differ:", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Pre-engine extract_insurance_data, kept verbatim as the benchmark baseline."""
+
+
+def extract_insurance_data(pdf_bytes: bytes):
+    """
+    Robust extractor for: name, VIN, plate, start_date, end_date
+    Works across multiple Romanian policy layouts (multi-column, different labels).
+    """
+    import fitz, re
+    from datetime import datetime
+
+    # --- helpers -------------------------------------------------------------
+    def norm_ws(s: str) -> str:
+        return re.sub(r"\s+", " ", s).strip()
+
+    def to_iso(d: str) -> str:
+        for fmt in ("%d.%m.%Y", "%d-%m-%Y", "%d/%m/%Y"):
+            try:
+                return datetime.strptime(d, fmt).strftime("%Y-%m-%d")
+            except:  # noqa: E722
+                pass
+        return ""
+
+    def normalize_plate(p: str) -> str:
+        p = re.sub(r"[^A-Z0-9]", "", p.upper())
+        # Romanian formats: B 99 ABC or AA 99 ABC
+        # Try to re-space nicely
+        if len(p) in (7, 8):  # common lengths after removing spaces
+            # Heuristic: if starts with B (one-letter county)
+            if p.startswith("B"):
+                # B + 2/3 digits + 3 letters
+                m = re.match(r"^B(\d{2,3})([A-Z]{3})$", p)
+                if m:
+                    return f"B {m.group(1)} {m.group(2)}"
+            # two-letter county
+            m = re.match(r"^([A-Z]{2})(\d{2,3})([A-Z]{3})$", p)
+            if m:
+                return f"{m.group(1)} {m.group(2)} {m.group(3)}"
+        return p  # fallback
+
+    # --- read PDF as ordered blocks -----------------------------------------
+    try:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            blocks_all = []
+            for page in doc:
+                blocks = page.get_text("blocks")  # (x0,y0,x1,y1,text, block_no, ...)
+                # sort by y then x to reconstruct reading order
+                blocks = sorted(blocks, key=lambda b: (round(b[1]), round(b[0])))
+                blocks_all.extend([norm_ws(b[4]) for b in blocks if b[4].strip()])
+            text = "\n".join(blocks_all)
+    except Exception as e:
+        print("PDF parse error:", e)
+        return {}
+
+    text_flat = norm_ws(text)
+    text_lc = text_flat.lower()
+
+    # --- search helpers (label proximity) ------------------------------------
+    def find_after(labels, max_chars=120):
+        """
+        Find the first occurrence of any label and return up to max_chars after it.
+        """
+        for lab in labels:
+            i = text_lc.find(lab.lower())
+            if i != -1:
+                seg = text_flat[i : i + len(lab) + max_chars]
+                return seg
+        return ""
+
+    # --- VIN (global, very reliable) -----------------------------------------
+    # VIN is 17 chars, excludes I,O,Q
+    vin = ""
+    vin_match = re.search(r"\b([A-HJ-NPR-Z0-9]{17})\b", text_flat)
+    if vin_match:
+        vin = vin_match.group(1)
+
+    # If not found, look near likely labels
+    if not vin:
+        near_vin = find_after(["VIN", "Serie șasiu", "Serie sasiu", "Serie CIV", "Serie"])
+        m = re.search(r"\b([A-HJ-NPR-Z0-9]{17})\b", near_vin)
+        vin = m.group(1) if m else ""
+
+    # --- Plate (global + normalized) -----------------------------------------
+    plate = ""
+    # AA 99 AAA or B 99 AAA (spaces optional in PDF)
+    plate_pat = r"\b((?:[A-Z]{2}\s?\d{2,3}\s?[A-Z]{3})|(?:B\s?\d{2,3}\s?[A-Z]{3}))\b"
+    m = re.search(plate_pat, text_flat)
+    if not m:
+        # look near labels
+        near_plate = find_after(
+            ["nr. înmatriculare", "nr inmatriculare", "număr înmatriculare",
+             "numar inmatriculare", "înregistrare", "inregistrare"], max_chars=80
+        )
+        m = re.search(plate_pat, near_plate)
+    if m:
+        plate = normalize_plate(m.group(1))
+
+    # --- Dates: prefer "de la ... / până la ..." context ---------------------
+    start, end = "", ""
+
+    # Capture within same small window
+    window = find_after(["valabilitate contract", "perioada de asigurare", "valabilitate"], max_chars=200)
+    m1 = re.search(r"de la\s*(\d{2}[./-]\d{2}[./-]\d{4})", window, flags=re.IGNORECASE)
+    m2 = re.search(r"p[aă]n[ăa]\s*la\s*(\d{2}[./-]\d{2}[./-]\d{4})", window, flags=re.IGNORECASE)
+    if m1:
+        start = to_iso(m1.group(1))
+    if m2:
+        end = to_iso(m2.group(1))
+
+    # Fallback: choose earliest as start, latest as end
+    if not start or not end:
+        all_dates = re.findall(r"(\d{2}[./-]\d{2}[./-]\d{4})", text_flat)
+        parsed = []
+        for d in all_dates:
+            iso = to_iso(d)
+            if iso:
+                parsed.append(datetime.strptime(iso, "%Y-%m-%d"))
+        parsed = sorted(set(parsed))
+        if parsed:
+            if not start:
+                start = parsed[0].strftime("%Y-%m-%d")
+            if not end and len(parsed) > 1:
+                # choose the farthest in future from start
+                end = parsed[-1].strftime("%Y-%m-%d")
+
+    # --- Name: search near common labels, prefer ALLCAPS tokens --------------
+    name = ""
+    near_name = find_after(
+        ["asigurat", "proprietar", "utilizator", "asigurat proprietar"], max_chars=120
+    )
+    # Strategy: pick 2–4 consecutive uppercase words (with diacritics allowed)
+    cap_word = r"[A-ZĂÂÎȘȚ][A-ZĂÂÎȘȚ\-']+"
+    m = re.search(rf"({cap_word}(?:\s+{cap_word}){{1,3}})", near_name)
+    if m:
+        name = m.group(1)
+    else:
+        # secondary: generic full name pattern anywhere
+        m2 = re.search(rf"\b({cap_word}\s+{cap_word}(?:\s+{cap_word})?)\b", text_flat)
+        if m2:
+            name = m2.group(1)
+
+    # Final cleanups
+    name = name.strip()
+    vin = vin.strip()
+    plate = plate.strip()
+
+    return {
+        "name": name,
+        "vin_number": vin,
+        "plate_number": plate,
+        "insurance_start": start,
+        "insurance_end": end,
+    }
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Synthetic Romanian policy PDFs for extraction benchmarks, built with fitz.
+
+Every document comes with the values the extractor is expected to return, so
+accuracy can be scored without any real (personal) policy data. Documents are
+drawn from a seeded RNG: the same seed always yields the same corpus.
+
+Layouts cover what app.extractor targets:
+  classic     one column of "Label: value" lines
+  two_column  insurer block on the left, policyholder / vehicle on the right
+  stacked     label on its own line, value on the line below
+  table       labels in a left column, values aligned in a second column
+with label spellings (with / without diacritics, alternative labels) and date
+formats (dd.mm.yyyy, dd-mm-yyyy, dd/mm/yyyy) varied per document, and a random
+number of general-conditions pages after the policy page.
+
+    python -m benchmarks.policy_corpus --out /tmp/corpus --docs 50
+"""
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+import fitz
+
+LAYOUTS = ("classic", "two_column", "stacked", "table")
+DATE_FORMATS = ("%d.%m.%Y", "%d-%m-%Y", "%d/%m/%Y")
+
+FIRST_NAMES = ["ION", "MARIA", "ANDREI", "ELENA", "ȘTEFAN", "IOANA", "MIHAI", "ANA", "RĂZVAN", "CĂTĂLINA"]
+LAST_NAMES = ["POPESCU", "IONESCU", "POPA", "DUMITRESCU", "STAN", "STOICA", "GHEORGHE", "RUSU",
+              "ȚĂRANU", "MUREȘAN", "BĂLAN", "CONSTANTINESCU"]
+COUNTIES = ["AB", "AG", "BC", "BH", "BV", "CJ", "CT", "DJ", "GL", "IS", "MM", "PH", "SB", "SV", "TM", "VL"]
+PLATE_LETTERS = "ABCDEFGHJKLMNPRSTUVWXYZ"
+VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+INSURERS = ["ALLIANZ ȚIRIAC ASIGURĂRI", "GROUPAMA ASIGURĂRI", "OMNIASIG VIG", "GENERALI ROMÂNIA", "ASIROM VIG"]
+
+NAME_LABELS = ["Asigurat", "Proprietar", "Utilizator", "Asigurat/Proprietar"]
+PLATE_LABELS = ["Nr. înmatriculare", "Nr. inmatriculare", "Număr înmatriculare", "Nr. înregistrare"]
+VIN_LABELS = ["Serie șasiu", "Serie sasiu", "Serie CIV", "VIN"]
+PERIOD_LABELS = ["Valabilitate contract", "Perioada de asigurare", "Valabilitate"]
+UNTIL_WORDS = ["până la", "pana la"]
+
+FILLER = ("Asigurătorul acoperă prejudiciile produse terților prin accidente de vehicule, "
+          "în limitele de despăgubire prevăzute de lege. Despăgubirile se acordă conform normelor ASF. ")
+
+FONT_SIZE = 10
+LINE_HEIGHT = 16
+
+
+# ---------- random field values ----------
+def _name(rng: random.Random) -> str:
+    return " ".join([rng.choice(LAST_NAMES)] + rng.sample(FIRST_NAMES, rng.choice((1, 2))))
+
+
+def _plate(rng: random.Random) -> tuple:
+    """(as printed, as the extractor normalizes it)"""
+    letters = "".join(rng.choice(PLATE_LETTERS) for _ in range(3))
+    if rng.random() < 0.25:
+        digits = f"{rng.randint(10, 999):02d}"
+        normalized = f"B {digits} {letters}"
+    else:
+        digits = f"{rng.randint(1, 99):02d}"
+        normalized = f"{rng.choice(COUNTIES)} {digits} {letters}"
+    printed = normalized.replace(" ", "") if rng.random() < 0.3 else normalized
+    return printed, normalized
+
+
+def _vin(rng: random.Random) -> str:
+    return "".join(rng.choice(VIN_CHARS) for _ in range(17))
+
+
+def _period(rng: random.Random) -> tuple:
+    start = date(2024, 1, 1) + timedelta(days=rng.randint(0, 730))
+    return start, start + timedelta(days=rng.choice((182, 364)))
+
+
+def random_policy(rng: random.Random) -> dict:
+    """Field values plus the presentation choices (labels, date format) for one document."""
+    plate_printed, plate = _plate(rng)
+    start, end = _period(rng)
+    return {
+        "name": _name(rng),
+        "plate_printed": plate_printed,
+        "plate_number": plate,
+        "vin_number": _vin(rng),
+        "start": start,
+        "end": end,
+        "insurer": rng.choice(INSURERS),
+        "date_format": rng.choice(DATE_FORMATS),
+        "name_label": rng.choice(NAME_LABELS),
+        "plate_label": rng.choice(PLATE_LABELS),
+        "vin_label": rng.choice(VIN_LABELS),
+        "period_label": rng.choice(PERIOD_LABELS),
+        "until": rng.choice(UNTIL_WORDS),
+        "policy_no": f"RO/{rng.randint(10, 99)}/{rng.randint(100000, 999999)}",
+    }
+
+
+def expected_fields(policy: dict) -> dict:
+    """What extract_insurance_data should return for the document."""
+    return {
+        "name": policy["name"],
+        "vin_number": policy["vin_number"],
+        "plate_number": policy["plate_number"],
+        "insurance_start": policy["start"].isoformat(),
+        "insurance_end": policy["end"].isoformat(),
+    }
+
+
+# ---------- page layouts ----------
+def _period_text(p: dict) -> str:
+    fmt = p["date_format"]
+    return f"de la {p['start'].strftime(fmt)} {p['until']} {p['end'].strftime(fmt)}"
+
+
+def _header(p: dict) -> list:
+    return [(72, "POLIȚĂ DE ASIGURARE RCA"), (72, f"Seria și numărul: {p['policy_no']}")]
+
+
+def _classic(p: dict) -> list:
+    lines = _header(p) + [
+        (72, f"{p['name_label']}: {p['name']}"),
+        (72, "Adresa: Str. Lalelelor nr. 5, Iași"),
+        (72, f"{p['plate_label']}: {p['plate_printed']}"),
+        (72, f"{p['vin_label']}: {p['vin_number']}"),
+        (72, f"{p['period_label']}: {_period_text(p)}"),
+        (72, f"Data emiterii: {(p['start'] - timedelta(days=2)).strftime(p['date_format'])}"),
+    ]
+    return [(x, 72 + i * LINE_HEIGHT, text) for i, (x, text) in enumerate(lines)]
+
+
+def _two_column(p: dict) -> list:
+    left = [
+        "Asigurator:",
+        p["insurer"],
+        "Sediul: Bd. Unirii nr. 1, București",
+        "CUI: RO 1234567",
+    ]
+    right = [
+        f"{p['name_label']}: {p['name']}",
+        f"{p['plate_label']}: {p['plate_printed']}",
+        f"{p['vin_label']}: {p['vin_number']}",
+    ]
+    items = [(x, 72 + i * LINE_HEIGHT, t) for i, (x, t) in enumerate(_header(p))]
+    top = 72 + 3 * LINE_HEIGHT
+    items += [(72, top + i * LINE_HEIGHT, t) for i, t in enumerate(left)]
+    items += [(320, top + i * LINE_HEIGHT, t) for i, t in enumerate(right)]
+    items.append((72, top + 5 * LINE_HEIGHT, f"{p['period_label']}: {_period_text(p)}"))
+    return items
+
+
+def _stacked(p: dict) -> list:
+    pairs = [
+        (p["name_label"], p["name"]),
+        (p["plate_label"], p["plate_printed"]),
+        (p["vin_label"], p["vin_number"]),
+        (p["period_label"], _period_text(p)),
+    ]
+    items = [(x, 72 + i * LINE_HEIGHT, t) for i, (x, t) in enumerate(_header(p))]
+    y = 72 + 3 * LINE_HEIGHT
+    for label, value in pairs:
+        items.append((72, y, label))
+        items.append((72, y + LINE_HEIGHT - 2, value))
+        y += 2 * LINE_HEIGHT + 6
+    return items
+
+
+def _table(p: dict) -> list:
+    rows = [
+        (p["name_label"], p["name"]),
+        ("Asigurator", p["insurer"]),
+        (p["plate_label"], p["plate_printed"]),
+        (p["vin_label"], p["vin_number"]),
+        (p["period_label"], _period_text(p)),
+    ]
+    items = [(x, 72 + i * LINE_HEIGHT, t) for i, (x, t) in enumerate(_header(p))]
+    y = 72 + 3 * LINE_HEIGHT
+    for label, value in rows:
+        items.append((72, y, label))
+        items.append((220, y, value))
+        y += LINE_HEIGHT + 4
+    return items
+
+
+LAYOUT_WRITERS = {
+    "classic": _classic,
+    "two_column": _two_column,
+    "stacked": _stacked,
+    "table": _table,
+}
+
+
+# ---------- documents ----------
+def make_policy_pdf(policy: dict, layout: str, condition_pages: int = 0) -> bytes:
+    doc = fitz.open()
+    # embedded (not base-14) font so Romanian diacritics survive the round trip
+    font = fitz.Font("helv").buffer
+    page = doc.new_page()
+    page.insert_font(fontname="ro", fontbuffer=font)
+    for x, y, text in LAYOUT_WRITERS[layout](policy):
+        page.insert_text((x, y), text, fontname="ro", fontsize=FONT_SIZE)
+    for n in range(condition_pages):
+        page = doc.new_page()
+        page.insert_font(fontname="ro", fontbuffer=font)
+        page.insert_text((72, 60), f"CONDIȚII GENERALE - pagina {n + 1}", fontname="ro", fontsize=FONT_SIZE)
+        for i in range(45):
+            page.insert_text((72, 80 + i * 15), FILLER[(i * 7) % 60:][:95], fontname="ro", fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def generate(count: int, seed: int = 2024, max_condition_pages: int = 12):
+    """Yield (doc_id, layout, pdf_bytes, expected) for `count` documents, layouts round-robin."""
+    rng = random.Random(seed)
+    for i in range(count):
+        layout = LAYOUTS[i % len(LAYOUTS)]
+        policy = random_policy(rng)
+        pages = rng.randint(0, max_condition_pages)
+        yield f"{i:04d}-{layout}", layout, make_policy_pdf(policy, layout, pages), expected_fields(policy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="directory for the PDFs and expected.json")
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    expected = {}
+    for doc_id, _, pdf_bytes, fields in generate(args.docs, args.seed):
+        (out / f"{doc_id}.pdf").write_bytes(pdf_bytes)
+        expected[doc_id] = fields
+    (out / "expected.json").write_text(json.dumps(expected, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"✅ Wrote {len(expected)} PDFs to {out}")
+
+
+if __name__ == "__main__":
+    main()